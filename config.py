@@ -5,7 +5,7 @@ This module handles loading and saving the config.yaml file.
 
 from pathlib import Path
 
-import yaml
+from lib.storage import dump_yaml, invalidate_parse_cache, load_yaml_cached, write_atomic
 
 # Path to the configuration file
 CONFIG_PATH = Path(__file__).parent / "config.yaml"
@@ -21,12 +21,15 @@ DEFAULT_CONFIG = {
 def load_config() -> dict:
     """Load configuration from config.yaml.
 
+    The parsed file is cached until it changes on disk; each call returns
+    a private copy that callers may modify.
+
     Returns:
         Configuration dict with projects and settings.
         Returns default config if file doesn't exist.
     """
     if CONFIG_PATH.exists():
-        return yaml.safe_load(CONFIG_PATH.read_text())
+        return load_yaml_cached(CONFIG_PATH)
     return DEFAULT_CONFIG.copy()
 
 
@@ -40,9 +43,9 @@ def save_config(config: dict) -> bool:
         True if saved successfully, False otherwise
     """
     try:
-        CONFIG_PATH.write_text(
-            yaml.dump(config, default_flow_style=False, sort_keys=False)
-        )
+        write_atomic(CONFIG_PATH, dump_yaml(config, allow_unicode=False))
         return True
     except Exception:
         return False
+    finally:
+        invalidate_parse_cache(CONFIG_PATH)
@@ -0,0 +1,9 @@
+"""Pytest configuration for Claude Monitor tests."""
+
+
+def pytest_configure(config):
+    """Register marks so runs without pytest-xdist don't warn about them."""
+    config.addinivalue_line(
+        "markers",
+        "xdist_group(name): keep tests sharing a module/class fixture on one xdist worker",
+    )
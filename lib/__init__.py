@@ -8,4 +8,6 @@ This package contains the core functionality modules:
 - projects: Project data, roadmap, and CLAUDE.md parsing
 - summarization: JSONL log parsing and session summarization
 - compression: History compression with OpenRouter API
+- storage: YAML load/dump helpers (libyaml-backed when available)
+- timestamps: Cached UTC ISO timestamp formatting
 """
@@ -2,20 +2,34 @@
 
 This module handles:
 - OpenRouter API integration
-- Compression queue management
+- Compression queue management (JSON sidecar per project, keyed by session_id)
 - Background compression worker thread
 - Session-to-history compression
 """
 
+import functools
 import threading
 import time
-from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 
 import requests
+from requests.adapters import HTTPAdapter
 
 from config import load_config
-from lib.projects import load_project_data, save_project_data
+from lib.projects import (
+    get_project_queue_path,
+    load_project_data,
+    save_project_data,
+)
+from lib.storage import (
+    dump_json,
+    invalidate_parse_cache,
+    load_json_cached,
+    parse_json,
+    write_atomic,
+)
+from lib.timestamps import utc_now_iso
 
 # Default OpenRouter configuration
 DEFAULT_OPENROUTER_MODEL = "anthropic/claude-3-haiku"
@@ -23,9 +37,38 @@ DEFAULT_COMPRESSION_INTERVAL = 300  # 5 minutes
 OPENROUTER_API_URL = "https://openrouter.ai/api/v1/chat/completions"
 OPENROUTER_TIMEOUT = 30  # seconds
 
+# Maximum number of projects whose queues are compressed concurrently
+COMPRESSION_MAX_WORKERS = 4
+
+# Maximum number of queued sessions compressed in one OpenRouter request
+COMPRESSION_BATCH_SIZE = 5
+
 # Retry configuration
 RETRY_DELAYS = [60, 300, 1800]  # 1min, 5min, 30min
 
+# Shared HTTP session so OpenRouter calls reuse pooled keep-alive connections.
+# Only one host is contacted; keep one idle connection per compression
+# worker plus one for the priorities request. Retries are left to the
+# compression queue, not the transport.
+_openrouter_session = requests.Session()
+_openrouter_session.mount(
+    "https://",
+    HTTPAdapter(pool_connections=1, pool_maxsize=COMPRESSION_MAX_WORKERS + 1, max_retries=0),
+)
+
+# Compression prompt pieces (the system message is shared, never mutated)
+_COMPRESSION_SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": """You are a concise technical writer. Compress session activity into a narrative summary.
+Focus on: what was worked on, key decisions, blockers encountered, current status.
+Keep it brief but meaningful. Use past tense. No bullet points - write prose."""
+}
+_MERGE_HISTORY_HEADER = "\n\nExisting history to merge with:\n"
+_MERGE_HISTORY_INSTRUCTION = "\n\nMerge the new session into the existing history, maintaining narrative flow."
+_FIRST_HISTORY_INSTRUCTION = "\n\nThis is the first session - create the initial history narrative."
+_BATCH_MERGE_HISTORY_INSTRUCTION = "\n\nMerge these sessions, in order, into the existing history, maintaining narrative flow."
+_BATCH_FIRST_HISTORY_INSTRUCTION = "\n\nThese are the first sessions - create the initial history narrative from them, in order."
+
 # Background thread reference
 _compression_thread: Optional[threading.Thread] = None
 _compression_stop_event = threading.Event()
@@ -36,6 +79,78 @@ _compression_stop_event = threading.Event()
 # =============================================================================
 
 
+def _index_queue(entries: list[dict]) -> dict[str, dict]:
+    """Key a legacy YAML queue list by session_id, keeping order."""
+    return {entry.get("session_id", "unknown"): entry for entry in entries}
+
+
+def _load_queue(project_name: str, readonly: bool = False) -> dict[str, dict]:
+    """Load a project's compression queue.
+
+    Reads the JSON sidecar, falling back to a legacy `pending_compressions`
+    list in the project YAML when no sidecar has been written yet. The
+    parsed sidecar is kept in memory until the file changes.
+
+    Args:
+        project_name: Name of the project
+        readonly: Return the shared cached queue; the caller must not mutate it
+
+    Returns:
+        Queued session summaries keyed by session_id, oldest first
+        (empty if none)
+    """
+    queue_path = get_project_queue_path(project_name)
+    if queue_path.exists():
+        try:
+            queue = load_json_cached(queue_path, readonly=readonly)
+        except Exception as e:
+            print(f"Warning: Failed to read compression queue for {project_name}: {e}")
+            return {}
+        return queue
+
+    # The parse cache makes this a stat for an unchanged project file; only
+    # take a private copy when there is a legacy queue to hand out
+    project_data = load_project_data(project_name, readonly=True)
+    if project_data is None or "pending_compressions" not in project_data:
+        return {}
+    if not readonly:
+        project_data = load_project_data(project_name)
+    return _index_queue(project_data["pending_compressions"] or [])
+
+
+def _save_queue(project_name: str, queue: dict[str, dict]) -> bool:
+    """Write a project's compression queue to its JSON sidecar.
+
+    Drops any legacy `pending_compressions` list from the project YAML once
+    the sidecar holds the queue.
+
+    Args:
+        project_name: Name of the project
+        queue: Queued session summaries keyed by session_id
+
+    Returns:
+        True if saved successfully
+    """
+    queue_path = get_project_queue_path(project_name)
+    try:
+        queue_path.parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(queue_path, dump_json(queue))
+    except Exception as e:
+        print(f"Warning: Failed to save compression queue for {project_name}: {e}")
+        return False
+    finally:
+        invalidate_parse_cache(queue_path)
+
+    # Check the shared cached copy; only take a private copy to strip the key
+    saved = load_project_data(project_name, readonly=True)
+    if saved is not None and "pending_compressions" in saved:
+        project_data = load_project_data(project_name)
+        del project_data["pending_compressions"]
+        save_project_data(project_name, project_data)
+
+    return True
+
+
 def add_to_compression_queue(project_name: str, session_summary: dict) -> bool:
     """Add a session to the project's pending compression queue.
 
@@ -46,28 +161,24 @@ def add_to_compression_queue(project_name: str, session_summary: dict) -> bool:
     Returns:
         True if session was added to queue
     """
-    project_data = load_project_data(project_name)
-    if project_data is None:
+    if load_project_data(project_name, readonly=True) is None:
         return False
 
-    # Initialize pending_compressions if not present
-    if "pending_compressions" not in project_data:
-        project_data["pending_compressions"] = []
+    queue = _load_queue(project_name)
 
     # Check if already queued
-    queued_ids = [s.get("session_id") for s in project_data["pending_compressions"]]
-    if session_summary.get("session_id") in queued_ids:
+    session_id = session_summary.get("session_id", "unknown")
+    if session_id in queue:
         return True  # Already queued
 
     # Add to queue with metadata
-    queue_entry = {
+    queue[session_id] = {
         **session_summary,
-        "queued_at": datetime.now(timezone.utc).isoformat(),
+        "queued_at": utc_now_iso(),
         "retry_count": 0
     }
-    project_data["pending_compressions"].append(queue_entry)
 
-    return save_project_data(project_name, project_data)
+    return _save_queue(project_name, queue)
 
 
 def get_pending_compressions(project_name: str) -> list[dict]:
@@ -77,13 +188,10 @@ def get_pending_compressions(project_name: str) -> list[dict]:
         project_name: Name of the project
 
     Returns:
-        List of session summaries pending compression
+        List of session summaries pending compression. The entries are
+        shared with the queue cache and must not be modified.
     """
-    project_data = load_project_data(project_name)
-    if project_data is None:
-        return []
-
-    return project_data.get("pending_compressions", [])
+    return list(_load_queue(project_name, readonly=True).values())
 
 
 def remove_from_compression_queue(project_name: str, session_id: str) -> bool:
@@ -96,23 +204,29 @@ def remove_from_compression_queue(project_name: str, session_id: str) -> bool:
     Returns:
         True if session was removed
     """
-    project_data = load_project_data(project_name)
-    if project_data is None:
-        return False
+    return _remove_sessions_from_queue(project_name, {session_id})
 
-    if "pending_compressions" not in project_data:
-        return True  # Nothing to remove
 
-    original_count = len(project_data["pending_compressions"])
-    project_data["pending_compressions"] = [
-        s for s in project_data["pending_compressions"]
-        if s.get("session_id") != session_id
-    ]
+def _remove_sessions_from_queue(project_name: str, session_ids: set[str]) -> bool:
+    """Remove several sessions from the compression queue with one write.
+
+    Args:
+        project_name: Name of the project
+        session_ids: IDs of the sessions to remove
+
+    Returns:
+        True if the sessions are no longer queued
+    """
+    if load_project_data(project_name, readonly=True) is None:
+        return False
 
-    if len(project_data["pending_compressions"]) < original_count:
-        return save_project_data(project_name, project_data)
+    queue = _load_queue(project_name)
+    removed = [queue.pop(session_id) for session_id in session_ids if session_id in queue]
 
-    return True  # Session wasn't in queue
+    if removed:
+        return _save_queue(project_name, queue)
+
+    return True  # Sessions weren't in queue
 
 
 # =============================================================================
@@ -129,7 +243,7 @@ def get_project_history(project_name: str) -> dict:
     Returns:
         Dict with 'summary' and 'last_compressed_at' (empty if no history)
     """
-    project_data = load_project_data(project_name)
+    project_data = load_project_data(project_name, readonly=True)
     if project_data is None:
         return {"summary": "", "last_compressed_at": None}
 
@@ -156,7 +270,7 @@ def update_project_history(project_name: str, summary: str) -> bool:
 
     project_data["history"] = {
         "summary": summary,
-        "last_compressed_at": datetime.now(timezone.utc).isoformat()
+        "last_compressed_at": utc_now_iso()
     }
 
     return save_project_data(project_name, project_data)
@@ -184,6 +298,17 @@ def get_openrouter_config() -> dict:
     }
 
 
+@functools.lru_cache(maxsize=4)
+def _openrouter_headers(api_key: str) -> dict:
+    """Build the OpenRouter request headers for an API key (cached, never mutated)."""
+    return {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json",
+        "HTTP-Referer": "https://github.com/samotage/claude_monitor",
+        "X-Title": "Claude Monitor"
+    }
+
+
 def call_openrouter(messages: list[dict], model: str = None) -> tuple[Optional[str], Optional[str]]:
     """Call OpenRouter chat completion API.
 
@@ -207,23 +332,16 @@ def call_openrouter(messages: list[dict], model: str = None) -> tuple[Optional[s
     if model is None:
         model = config["model"]
 
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json",
-        "HTTP-Referer": "https://github.com/samotage/claude_monitor",
-        "X-Title": "Claude Monitor"
-    }
+    headers = _openrouter_headers(api_key)
 
-    payload = {
-        "model": model,
-        "messages": messages
-    }
+    # Serialize once here so requests sends the bytes as-is
+    body = dump_json({"model": model, "messages": messages})
 
     try:
-        response = requests.post(
+        response = _openrouter_session.post(
             OPENROUTER_API_URL,
             headers=headers,
-            json=payload,
+            data=body,
             timeout=OPENROUTER_TIMEOUT
         )
 
@@ -236,7 +354,7 @@ def call_openrouter(messages: list[dict], model: str = None) -> tuple[Optional[s
         if response.status_code != 200:
             return None, f"API error: HTTP {response.status_code}"
 
-        data = response.json()
+        data = parse_json(response.content)
         content = data.get("choices", [{}])[0].get("message", {}).get("content", "")
         if not content:
             return None, "Empty response from API"
@@ -245,8 +363,9 @@ def call_openrouter(messages: list[dict], model: str = None) -> tuple[Optional[s
 
     except requests.Timeout:
         return None, "timeout"
-    except requests.RequestException as e:
+    except (requests.RequestException, ValueError) as e:
         # Sanitize error message to avoid leaking sensitive info
+        # (ValueError covers a body that is not valid JSON)
         return None, f"Request failed: {type(e).__name__}"
 
 
@@ -255,20 +374,15 @@ def call_openrouter(messages: list[dict], model: str = None) -> tuple[Optional[s
 # =============================================================================
 
 
-def build_compression_prompt(session_data: dict, existing_history: str = "") -> list[dict]:
-    """Build the prompt for compressing a session into history.
+def _format_session_info(session_data: dict) -> list[str]:
+    """Format a session summary as prompt lines.
 
     Args:
         session_data: Session summary dict with files_modified, commands_run, errors, etc.
-        existing_history: Existing history summary to merge with (empty for first compression)
 
     Returns:
-        List of message dicts for OpenRouter API
+        List of "Label: value" lines for the fields that are present
     """
-    system_prompt = """You are a concise technical writer. Compress session activity into a narrative summary.
-Focus on: what was worked on, key decisions, blockers encountered, current status.
-Keep it brief but meaningful. Use past tense. No bullet points - write prose."""
-
     session_info = []
     if session_data.get("started_at"):
         session_info.append(f"Started: {session_data['started_at']}")
@@ -285,19 +399,63 @@ Keep it brief but meaningful. Use past tense. No bullet points - write prose."""
         session_info.append(f"Errors: {'; '.join(errors)}")
     if session_data.get("summary"):
         session_info.append(f"Session summary: {session_data['summary']}")
+    return session_info
+
+
+def build_compression_prompt(session_data: dict, existing_history: str = "") -> list[dict]:
+    """Build the prompt for compressing a session into history.
+
+    Args:
+        session_data: Session summary dict with files_modified, commands_run, errors, etc.
+        existing_history: Existing history summary to merge with (empty for first compression)
+
+    Returns:
+        List of message dicts for OpenRouter API
+    """
+    parts = ["Compress this session into the project history:\n\n"]
+    parts.append("\n".join(_format_session_info(session_data)))
+    return _compression_messages(parts, existing_history)
+
+
+def build_batch_compression_prompt(sessions: list[dict], existing_history: str = "") -> list[dict]:
+    """Build one prompt that compresses several sessions into history.
+
+    A single session produces the same prompt as build_compression_prompt().
+
+    Args:
+        sessions: Session summary dicts, oldest first
+        existing_history: Existing history summary to merge with (empty for first compression)
+
+    Returns:
+        List of message dicts for OpenRouter API
+    """
+    if len(sessions) == 1:
+        return build_compression_prompt(sessions[0], existing_history)
+
+    parts = [f"Compress these {len(sessions)} sessions, in order, into the project history:\n\n"]
+    for number, session_data in enumerate(sessions, start=1):
+        if number > 1:
+            parts.append("\n\n")
+        parts.append(f"Session {number}:\n")
+        parts.append("\n".join(_format_session_info(session_data)))
+    return _compression_messages(parts, existing_history, batch=True)
+
 
-    user_content = "Compress this session into the project history:\n\n"
-    user_content += "\n".join(session_info)
+def _compression_messages(parts: list[str], existing_history: str, batch: bool = False) -> list[dict]:
+    """Finish the user message from its parts and pair it with the system prompt.
 
+    The parts are joined once, after the merge instructions are appended.
+    Batch prompts get instructions worded for several sessions.
+    """
     if existing_history:
-        user_content += f"\n\nExisting history to merge with:\n{existing_history}"
-        user_content += "\n\nMerge the new session into the existing history, maintaining narrative flow."
+        instruction = _BATCH_MERGE_HISTORY_INSTRUCTION if batch else _MERGE_HISTORY_INSTRUCTION
+        parts.extend((_MERGE_HISTORY_HEADER, existing_history, instruction))
     else:
-        user_content += "\n\nThis is the first session - create the initial history narrative."
+        parts.append(_BATCH_FIRST_HISTORY_INSTRUCTION if batch else _FIRST_HISTORY_INSTRUCTION)
 
     return [
-        {"role": "system", "content": system_prompt},
-        {"role": "user", "content": user_content}
+        _COMPRESSION_SYSTEM_MESSAGE,
+        {"role": "user", "content": "".join(parts)}
     ]
 
 
@@ -308,6 +466,19 @@ def compress_session(project_name: str, session_data: dict) -> tuple[bool, Optio
         project_name: Name of the project
         session_data: Session summary dict to compress
 
+    Returns:
+        Tuple of (success, error_message)
+    """
+    return compress_sessions(project_name, [session_data])
+
+
+def compress_sessions(project_name: str, sessions: list[dict]) -> tuple[bool, Optional[str]]:
+    """Compress several sessions with one API call and update project history.
+
+    Args:
+        project_name: Name of the project
+        sessions: Session summary dicts to compress, oldest first
+
     Returns:
         Tuple of (success, error_message)
     """
@@ -316,7 +487,7 @@ def compress_session(project_name: str, session_data: dict) -> tuple[bool, Optio
     existing_summary = history.get("summary", "")
 
     # Build and send compression request
-    messages = build_compression_prompt(session_data, existing_summary)
+    messages = build_batch_compression_prompt(sessions, existing_summary)
     response, error = call_openrouter(messages)
 
     if error:
@@ -329,26 +500,30 @@ def compress_session(project_name: str, session_data: dict) -> tuple[bool, Optio
         return False, "Failed to save history"
 
 
-def _increment_retry_count(project_name: str, session_id: str) -> None:
-    """Increment the retry count for a queued session."""
-    project_data = load_project_data(project_name)
-    if project_data is None:
-        return
-
-    pending = project_data.get("pending_compressions", [])
-    for session in pending:
-        if session.get("session_id") == session_id:
+def _increment_retry_count(project_name: str, session_ids: set[str]) -> None:
+    """Increment the retry count for queued sessions."""
+    queue = _load_queue(project_name)
+    now = utc_now_iso()
+    updated = False
+    for session_id in session_ids:
+        session = queue.get(session_id)
+        if session is not None:
             session["retry_count"] = session.get("retry_count", 0) + 1
-            session["last_retry_at"] = datetime.now(timezone.utc).isoformat()
-            break
+            session["last_retry_at"] = now
+            updated = True
 
-    save_project_data(project_name, project_data)
+    if updated:
+        _save_queue(project_name, queue)
 
 
 def process_compression_queue(project_name: str) -> dict:
     """Process all pending compressions for a project.
 
-    Handles retries with exponential backoff.
+    Queued sessions are compressed oldest first, up to
+    COMPRESSION_BATCH_SIZE per API call. Each batch's history is saved
+    before its sessions leave the queue. The first failing batch stops the
+    run; it and every later session stay queued for the next cycle, and
+    only the failing batch has its retry count incremented.
 
     Args:
         project_name: Name of the project
@@ -359,36 +534,60 @@ def process_compression_queue(project_name: str) -> dict:
     pending = get_pending_compressions(project_name)
     results = {"processed": 0, "failed": 0, "remaining": 0}
 
-    for session in pending:
-        session_id = session.get("session_id", "unknown")
-        retry_count = session.get("retry_count", 0)
-
-        success, error = compress_session(project_name, session)
+    for start in range(0, len(pending), COMPRESSION_BATCH_SIZE):
+        batch = pending[start:start + COMPRESSION_BATCH_SIZE]
+        session_ids = [session.get("session_id", "unknown") for session in batch]
 
+        # compress_sessions() writes the history and reports whether that
+        # write succeeded, so the sessions only leave the queue once it has
+        success, error = compress_sessions(project_name, batch)
         if success:
-            remove_from_compression_queue(project_name, session_id)
-            results["processed"] += 1
-            print(f"Info: Compressed session {session_id[:8]}... for {project_name}")
+            _remove_sessions_from_queue(project_name, set(session_ids))
+            results["processed"] += len(batch)
+            for session_id in session_ids:
+                print(f"Info: Compressed session {session_id[:8]}... for {project_name}")
+            continue
+
+        unprocessed = len(pending) - start
+        if error == "authentication_failed":
+            # Don't retry auth errors, but keep queued
+            results["failed"] = unprocessed
+            print(f"Error: OpenRouter authentication failed (check API key)")
         else:
-            # Handle retry logic
-            if error in ["rate_limited", "timeout"]:
-                # Increment retry count for next cycle
-                _increment_retry_count(project_name, session_id)
-                results["remaining"] += 1
-                print(f"Warning: Compression retry needed for {session_id[:8]}... ({error})")
-            elif error == "authentication_failed":
-                # Don't retry auth errors, but keep queued
-                results["failed"] += 1
-                print(f"Error: OpenRouter authentication failed (check API key)")
-            else:
-                # Other errors - increment retry count
-                _increment_retry_count(project_name, session_id)
-                results["remaining"] += 1
-                print(f"Warning: Compression failed for {session_id[:8]}... ({error})")
+            # Rate limits, timeouts and other errors - increment retry count
+            _increment_retry_count(project_name, set(session_ids))
+            results["remaining"] = unprocessed
+            for session_id in session_ids:
+                if error in ["rate_limited", "timeout"]:
+                    print(f"Warning: Compression retry needed for {session_id[:8]}... ({error})")
+                else:
+                    print(f"Warning: Compression failed for {session_id[:8]}... ({error})")
+        break
 
     return results
 
 
+def process_all_compression_queues(project_names: list[str]) -> dict[str, dict]:
+    """Process the compression queues of several projects concurrently.
+
+    Each project touches only its own files, so queues are handled in a
+    thread pool and their OpenRouter requests overlap.
+
+    Args:
+        project_names: Names of the projects to process
+
+    Returns:
+        Dict mapping project name to its process_compression_queue() results,
+        for projects that had pending sessions
+    """
+    due = [name for name in project_names if get_pending_compressions(name)]
+    if not due:
+        return {}
+
+    with ThreadPoolExecutor(max_workers=min(COMPRESSION_MAX_WORKERS, len(due))) as pool:
+        return dict(zip(due, pool.map(process_compression_queue, due)))
+
+
 # =============================================================================
 # Background Compression Thread
 # =============================================================================
@@ -403,13 +602,9 @@ def _compression_worker() -> None:
         # Process all projects
         main_config = load_config()
         projects = main_config.get("projects", [])
-
-        for project in projects:
-            project_name = project.get("name")
-            if project_name:
-                pending = get_pending_compressions(project_name)
-                if pending:
-                    process_compression_queue(project_name)
+        process_all_compression_queues(
+            [project.get("name") for project in projects if project.get("name")]
+        )
 
         # Wait for next cycle (check stop event periodically)
         for _ in range(int(interval)):
@@ -12,10 +12,16 @@ from datetime import datetime, timezone
 from pathlib import Path
 from typing import Optional
 
-import yaml
-
 from config import load_config
 from lib.projects import get_all_project_roadmaps, get_all_project_states
+from lib.storage import (
+    dump_yaml,
+    invalidate_parse_cache,
+    load_yaml,
+    load_yaml_cached,
+    write_atomic,
+)
+from lib.timestamps import utc_now_iso
 
 # Path to the headspace data file
 HEADSPACE_DATA_PATH = Path(__file__).parent.parent / "data" / "headspace.yaml"
@@ -70,7 +76,7 @@ def load_headspace() -> Optional[dict]:
         return None
 
     try:
-        data = yaml.safe_load(HEADSPACE_DATA_PATH.read_text())
+        data = load_yaml_cached(HEADSPACE_DATA_PATH, readonly=True)
         if data and "current_focus" in data:
             return {
                 "current_focus": data.get("current_focus"),
@@ -101,16 +107,16 @@ def save_headspace(current_focus: str, constraints: Optional[str] = None) -> dic
     existing_data = {}
     if HEADSPACE_DATA_PATH.exists():
         try:
-            existing_data = yaml.safe_load(HEADSPACE_DATA_PATH.read_text()) or {}
+            existing_data = load_yaml(HEADSPACE_DATA_PATH) or {}
         except Exception:
             existing_data = {}
 
-    # Append to history if enabled and there's existing data
+    # Archive the previous value in memory so the file is written only once
     if is_headspace_history_enabled() and existing_data.get("current_focus"):
-        append_headspace_history(existing_data)
+        _push_headspace_history(existing_data, existing_data)
 
     # Create new headspace data
-    updated_at = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+    updated_at = utc_now_iso(z_suffix=True)
     new_data = {
         "current_focus": current_focus,
         "constraints": constraints,
@@ -122,9 +128,8 @@ def save_headspace(current_focus: str, constraints: Optional[str] = None) -> dic
         new_data["history"] = existing_data["history"]
 
     # Write to file
-    HEADSPACE_DATA_PATH.write_text(
-        yaml.dump(new_data, default_flow_style=False, sort_keys=False, allow_unicode=True)
-    )
+    write_atomic(HEADSPACE_DATA_PATH, dump_yaml(new_data))
+    invalidate_parse_cache(HEADSPACE_DATA_PATH)
 
     return {
         "current_focus": current_focus,
@@ -133,6 +138,23 @@ def save_headspace(current_focus: str, constraints: Optional[str] = None) -> dic
     }
 
 
+def _push_headspace_history(data: dict, headspace_data: dict) -> None:
+    """Prepend a headspace entry to data["history"], keeping the last 50.
+
+    Args:
+        data: Headspace file contents to update in place
+        headspace_data: The headspace data to archive to history
+    """
+    history_entry = {
+        "current_focus": headspace_data.get("current_focus"),
+        "constraints": headspace_data.get("constraints"),
+        "updated_at": headspace_data.get("updated_at")
+    }
+
+    # Prepend to history (most recent first), keeping only last 50 entries
+    data["history"] = [history_entry, *data.get("history", [])][:50]
+
+
 def append_headspace_history(headspace_data: dict) -> None:
     """Append a headspace entry to history.
 
@@ -146,33 +168,15 @@ def append_headspace_history(headspace_data: dict) -> None:
     existing = {}
     if HEADSPACE_DATA_PATH.exists():
         try:
-            existing = yaml.safe_load(HEADSPACE_DATA_PATH.read_text()) or {}
+            existing = load_yaml(HEADSPACE_DATA_PATH) or {}
         except Exception:
             existing = {}
 
-    # Initialize history list if needed
-    history = existing.get("history", [])
-
-    # Create history entry
-    history_entry = {
-        "current_focus": headspace_data.get("current_focus"),
-        "constraints": headspace_data.get("constraints"),
-        "updated_at": headspace_data.get("updated_at")
-    }
-
-    # Prepend to history (most recent first)
-    history.insert(0, history_entry)
-
-    # Keep only last 50 entries
-    history = history[:50]
-
-    # Update the existing data with new history
-    existing["history"] = history
+    _push_headspace_history(existing, headspace_data)
 
     # Write back
-    HEADSPACE_DATA_PATH.write_text(
-        yaml.dump(existing, default_flow_style=False, sort_keys=False, allow_unicode=True)
-    )
+    write_atomic(HEADSPACE_DATA_PATH, dump_yaml(existing))
+    invalidate_parse_cache(HEADSPACE_DATA_PATH)
 
 
 def get_headspace_history() -> list:
@@ -185,7 +189,7 @@ def get_headspace_history() -> list:
         return []
 
     try:
-        data = yaml.safe_load(HEADSPACE_DATA_PATH.read_text())
+        data = load_yaml_cached(HEADSPACE_DATA_PATH, readonly=True)
         return data.get("history", []) if data else []
     except Exception:
         return []
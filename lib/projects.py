@@ -8,21 +8,46 @@ This module handles:
 - Brain reboot briefings
 """
 
+import copy
+import mmap
+import os
 import re
+import threading
+from contextlib import contextmanager
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Optional
 
-import yaml
-
 from config import load_config
+from lib.storage import (
+    dump_yaml,
+    invalidate_parse_cache,
+    load_yaml_cached,
+    prime_parse_cache,
+    write_atomic,
+)
+from lib.timestamps import utc_now_iso
 
 # Path to project data directory
 PROJECT_DATA_DIR = Path(__file__).parent.parent / "data" / "projects"
 
+# Project saves deferred by batched_project_saves(), per thread:
+# pending maps path -> (name, data); failed collects names whose flush failed
+_save_batch = threading.local()
+
 # Brain Reboot defaults
 DEFAULT_STALE_THRESHOLD_HOURS = 4
 
+# CLAUDE.md sections, matched against the raw file bytes
+_OVERVIEW_SECTION_RE = re.compile(
+    rb'##\s*Project\s*Overview\s*\n+(.*?)(?=\n##|\n---|\Z)',
+    re.IGNORECASE | re.DOTALL
+)
+_TECH_STACK_SECTION_RE = re.compile(
+    rb'##\s*Tech\s*Stack\s*\n+(.*?)(?=\n##|\n---|\Z)',
+    re.IGNORECASE | re.DOTALL
+)
+
 
 # =============================================================================
 # Project Data CRUD
@@ -57,11 +82,31 @@ def get_project_data_path(name: str) -> Path:
     return PROJECT_DATA_DIR / f"{slug}.yaml"
 
 
-def load_project_data(name_or_path: str) -> Optional[dict]:
+def get_project_queue_path(name: str) -> Path:
+    """Get the path to a project's compression queue sidecar file.
+
+    The queue is machine-only state, so it is kept as JSON next to the
+    project's YAML rather than inside it.
+
+    Args:
+        name: Project name (will be slugified)
+
+    Returns:
+        Path to data/projects/<slug>.queue.json
+    """
+    slug = slugify_name(name)
+    return PROJECT_DATA_DIR / f"{slug}.queue.json"
+
+
+def load_project_data(name_or_path: str, readonly: bool = False) -> Optional[dict]:
     """Load a project's YAML data.
 
+    Parsed files are cached until they change on disk.
+
     Args:
         name_or_path: Project name or direct path to YAML file
+        readonly: Return the shared cached dict instead of a private copy.
+            Only pass True when the result will not be mutated.
 
     Returns:
         Project data dict or None if not found
@@ -72,9 +117,14 @@ def load_project_data(name_or_path: str) -> Optional[dict]:
     else:
         path = get_project_data_path(name_or_path)
 
+    pending = getattr(_save_batch, "pending", None)
+    if pending and str(path) in pending:
+        data = pending[str(path)][1]
+        return data if readonly else copy.deepcopy(data)
+
     if path.exists():
         try:
-            return yaml.safe_load(path.read_text())
+            return load_yaml_cached(path, readonly=readonly)
         except Exception:
             return None
     return None
@@ -83,45 +133,115 @@ def load_project_data(name_or_path: str) -> Optional[dict]:
 def save_project_data(name: str, data: dict) -> bool:
     """Save a project's YAML data.
 
-    Updates the refreshed_at timestamp automatically.
+    Updates the refreshed_at timestamp automatically. Inside a
+    batched_project_saves() block the write is deferred until the block exits.
 
     Args:
         name: Project name (will be slugified)
         data: Project data dict
 
     Returns:
-        True if saved successfully
+        True if saved (or buffered) successfully
     """
     path = get_project_data_path(name)
 
-    # Ensure directory exists
-    path.parent.mkdir(parents=True, exist_ok=True)
-
     # Update refreshed_at timestamp
     if "context" not in data:
         data["context"] = {}
-    data["context"]["refreshed_at"] = datetime.now(timezone.utc).isoformat()
+    data["context"]["refreshed_at"] = utc_now_iso()
+
+    pending = getattr(_save_batch, "pending", None)
+    if pending is not None:
+        pending[str(path)] = (name, data)
+        return True
+
+    return _write_project_data(path, name, data)
+
+
+def _write_project_data(path: Path, name: str, data: dict) -> bool:
+    """Write project data to its YAML file.
+
+    After a write the parse cache holds data, so the next load skips parsing.
+
+    Args:
+        path: Path to the project's YAML file
+        name: Project name (for error messages)
+        data: Project data dict
+
+    Returns:
+        True if written successfully
+    """
+    # Ensure directory exists
+    path.parent.mkdir(parents=True, exist_ok=True)
 
     try:
-        path.write_text(yaml.dump(data, default_flow_style=False, sort_keys=False, allow_unicode=True))
+        write_atomic(path, dump_yaml(data))
+        prime_parse_cache(path, data)
         return True
     except Exception as e:
+        invalidate_parse_cache(path)
         print(f"Warning: Failed to save project data for {name}: {e}")
         return False
 
 
-def list_project_data() -> list[dict]:
+@contextmanager
+def batched_project_saves():
+    """Defer project file writes in this thread until the block exits.
+
+    Inside the block save_project_data() buffers the data and returns True
+    without touching disk, and load_project_data() reads it back from the
+    buffer, so a run of load-mutate-save calls against one project writes
+    its file once. Nested blocks are folded into the outermost one.
+
+    Because saves inside the block cannot fail, callers must check the
+    yielded list after the block exits before acting on the saved state.
+    Never do irreversible work (such as dropping queued data) inside it.
+
+    Keep blocks short: writes made by other threads in the meantime are
+    overwritten when the buffer is flushed.
+
+    Yields:
+        List that, once the outermost block has exited, holds the names of
+        projects whose write failed (empty if everything was saved)
+    """
+    failed = getattr(_save_batch, "failed", None)
+    if getattr(_save_batch, "pending", None) is not None:
+        yield failed
+        return
+
+    failed = []
+    _save_batch.pending = {}
+    _save_batch.failed = failed
+    try:
+        yield failed
+    finally:
+        pending = _save_batch.pending
+        _save_batch.pending = None
+        _save_batch.failed = None
+        for path_str, (name, data) in pending.items():
+            if not _write_project_data(Path(path_str), name, data):
+                failed.append(name)
+
+
+def list_project_data(readonly: bool = False) -> list[dict]:
     """List all registered projects with their data.
 
+    Args:
+        readonly: Return the shared cached dicts instead of private copies.
+            Only pass True when the results will not be mutated.
+
     Returns:
         List of project data dicts
     """
     projects = []
     if PROJECT_DATA_DIR.exists():
-        for yaml_file in PROJECT_DATA_DIR.glob("*.yaml"):
-            data = load_project_data(str(yaml_file))
-            if data:
-                projects.append(data)
+        # scandir yields names and types without building a Path per entry
+        with os.scandir(PROJECT_DATA_DIR) as entries:
+            for entry in entries:
+                if entry.name.endswith(".yaml") and entry.is_file():
+                    data = load_project_data(entry.path, readonly=readonly)
+                    if data:
+                        projects.append(data)
     return projects
 
 
@@ -197,6 +317,31 @@ def normalize_roadmap(roadmap: Optional[dict]) -> dict:
 # =============================================================================
 
 
+def _read_claude_md_sections(claude_md_path: Path) -> tuple[Optional[str], Optional[str]]:
+    """Extract the Project Overview and Tech Stack section bodies from CLAUDE.md.
+
+    The file is memory-mapped and searched as bytes, so only the two
+    matched sections are decoded rather than the whole document.
+
+    Args:
+        claude_md_path: Path to the CLAUDE.md file
+
+    Returns:
+        Tuple of (overview_text, tech_stack_text), None for missing sections
+    """
+    with open(claude_md_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None, None  # mmap cannot map an empty file
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content:
+            goal_match = _OVERVIEW_SECTION_RE.search(content)
+            tech_match = _TECH_STACK_SECTION_RE.search(content)
+            return (
+                goal_match.group(1).decode("utf-8", errors="replace") if goal_match else None,
+                tech_match.group(1).decode("utf-8", errors="replace") if tech_match else None,
+            )
+
+
 def parse_claude_md(project_path: str) -> dict:
     """Parse a project's CLAUDE.md file to extract goal and tech stack.
 
@@ -214,33 +359,23 @@ def parse_claude_md(project_path: str) -> dict:
         return result
 
     try:
-        content = claude_md_path.read_text()
+        goal_text, tech_text = _read_claude_md_sections(claude_md_path)
     except Exception as e:
         print(f"Warning: Could not read CLAUDE.md at {project_path}: {e}")
         return result
 
     # Extract Project Overview section for goal
-    goal_match = re.search(
-        r'##\s*Project\s*Overview\s*\n+(.*?)(?=\n##|\n---|\Z)',
-        content,
-        re.IGNORECASE | re.DOTALL
-    )
-    if goal_match:
+    if goal_text:
         # Get first paragraph/meaningful content
-        goal_text = goal_match.group(1).strip()
+        goal_text = goal_text.strip()
         # Take first non-empty line or first paragraph
         lines = [l.strip() for l in goal_text.split('\n') if l.strip()]
         if lines:
             result["goal"] = lines[0]
 
     # Extract Tech Stack section
-    tech_match = re.search(
-        r'##\s*Tech\s*Stack\s*\n+(.*?)(?=\n##|\n---|\Z)',
-        content,
-        re.IGNORECASE | re.DOTALL
-    )
-    if tech_match:
-        tech_text = tech_match.group(1).strip()
+    if tech_text:
+        tech_text = tech_text.strip()
         # Take first line or consolidate bullet points
         lines = [l.strip().lstrip('- ').lstrip('* ') for l in tech_text.split('\n') if l.strip()]
         if lines:
@@ -286,7 +421,7 @@ def register_project(name: str, path: str) -> bool:
         "context": {
             "tech_stack": claude_info["tech_stack"],
             "target_users": "",
-            "refreshed_at": datetime.now(timezone.utc).isoformat(),
+            "refreshed_at": utc_now_iso(),
         },
         "roadmap": {},
         "state": {},
@@ -495,7 +630,7 @@ def get_all_project_roadmaps() -> dict:
         Dict mapping project_name to roadmap data (next_up, upcoming)
     """
     roadmaps = {}
-    projects = list_project_data()
+    projects = list_project_data(readonly=True)
 
     for project in projects:
         name = project.get("name", "unknown")
@@ -516,7 +651,7 @@ def get_all_project_states() -> dict:
         Dict mapping project_name to state data (summary, recent context)
     """
     states = {}
-    projects = list_project_data()
+    projects = list_project_data(readonly=True)
 
     for project in projects:
         name = project.get("name", "unknown")
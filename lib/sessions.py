@@ -6,12 +6,132 @@ This module handles:
 - Formatting session information
 """
 
+import functools
 import json
 import re
 from datetime import datetime, timezone
 from pathlib import Path
 
 from lib.iterm import get_iterm_windows, get_pid_tty
+from lib.timestamps import parse_iso
+
+# Braille spinner characters indicate processing (Claude's turn - working)
+# Full Unicode braille pattern range, plus common loading spinners
+_SPINNER_CHARS = frozenset(
+    "⠁⠂⠃⠄⠅⠆⠇⠈⠉⠊⠋⠌⠍⠎⠏⠐⠑⠒⠓⠔⠕⠖⠗⠘⠙⠚⠛⠜⠝⠞⠟⠠⠡⠢⠣⠤⠥⠦⠧⠨⠩⠪⠫⠬⠭⠮⠯⠰⠱⠲⠳⠴⠵⠶⠷⠸⠹⠺⠻⠼⠽⠾⠿⡀⡄⡆⡇"
+    "◐◑◒◓◴◵◶◷⣾⣽⣻⢿⡿⣟⣯⣷⠋⠙⠹⠸⠼⠴⠦⠧⠇⠏"
+)
+
+# Star/asterisk/prompt indicators = session not processing
+_IDLE_CHARS = frozenset("✳✱✲✴✵✶✷✸*›❯>$▶")
+
+# Permission/warning characters (used for title cleanup)
+_PERMISSION_CHARS = frozenset("?❓⚠️🔒⏸")
+
+# Any status character that may prefix a window title
+_STATUS_PREFIX_CHARS = _SPINNER_CHARS | _IDLE_CHARS | _PERMISSION_CHARS
+
+# Base activity state by title prefix character, for a single lookup
+_TITLE_PREFIX_STATES = {
+    **dict.fromkeys(_IDLE_CHARS, "idle"),
+    **dict.fromkeys(_SPINNER_CHARS, "processing"),
+}
+
+# Patterns in terminal content that indicate Claude is waiting for user input
+# These appear when Claude asks a question or needs permission
+_INPUT_NEEDED_PATTERNS = (
+    # Claude Code built-in UI patterns
+    "Esc to cancel",
+    "Tab to add additional instructions",
+    "Do you want to proceed?",
+    "Yes, and don't ask again",
+    "Yes, and always allow",
+    "Allow once",
+    "Allow for this session",
+    "❯ 1.",  # Numbered choice prompt
+    "❯ Yes",
+    "❯ No",
+    # AskUserQuestion tool patterns
+    "Enter to select",
+    "to navigate",
+    "Type something",
+    # Yes/no prompt variations
+    "[y/n]",
+    "[Y/n]",
+    "[y/N]",
+    "(y/n)",
+    "(Y/n)",
+    "(y/N)",
+    "[yes/no]",
+    "(yes/no)",
+    "yes or no",
+    "y or n?",
+    # Proceed/continue prompts
+    "proceed?",
+    "continue?",
+    "should I proceed",
+    "should I continue",
+    "shall I proceed",
+    "shall I continue",
+    "want me to proceed",
+    "want me to continue",
+    "ready to proceed",
+    # Confirmation prompts
+    "confirm?",
+    "is this correct",
+    "is that correct",
+    "does this look",
+    "sound good?",
+    "look good?",
+    "looks good?",
+    "make sense?",
+    "what do you think",
+    # Choice/selection prompts
+    "which option",
+    "which approach",
+    "what would you prefer",
+    "would you prefer",
+    "please choose",
+    "please select",
+    "your choice",
+    # Permission prompts
+    "may I",
+    "can I proceed",
+    "shall I",
+    "would you like me to",
+    "do you want me to",
+    # Waiting for input
+    "waiting for your",
+    "let me know",
+    "please respond",
+    "your input",
+    "your feedback",
+    "awaiting your",
+    # Checkpoint patterns (like the example)
+    "CHECKPOINT:",
+    "checkpoint:",
+)
+
+# All input-needed patterns as one case-insensitive alternation, so the
+# terminal tail is scanned once without lowercasing a copy of it
+_INPUT_NEEDED_RE = re.compile(
+    "|".join(re.escape(pattern) for pattern in _INPUT_NEEDED_PATTERNS),
+    re.IGNORECASE,
+)
+
+# Session UUIDs embedded in window titles (stripped from task summaries)
+_UUID_RE = re.compile(
+    r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}",
+    re.IGNORECASE,
+)
+
+# Only the end of the terminal tail is scanned for input prompts; prompts
+# sit at the bottom of the screen, above at most a few option lines
+CONTENT_SCAN_CHARS = 2048
+
+# Parsed (title, content tail) pairs remembered across polls; roughly a few
+# polls' worth of windows, at most ~256 * 5 KB of tail text
+ACTIVITY_STATE_CACHE_SIZE = 256
 
 
 def scan_sessions(config: dict) -> list[dict]:
@@ -25,6 +145,7 @@ def scan_sessions(config: dict) -> list[dict]:
     """
     sessions = []
     iterm_windows = get_iterm_windows()  # Returns {tty: {"title": str, "content_tail": str}}
+    now = datetime.now(timezone.utc)  # One clock read for every session in this scan
 
     for project in config.get("projects", []):
         project_path = Path(project["path"])
@@ -57,8 +178,7 @@ def scan_sessions(config: dict) -> list[dict]:
                 # Parse started_at
                 started_at = state.get("started_at", "")
                 try:
-                    start_time = datetime.fromisoformat(started_at.replace("Z", "+00:00"))
-                    elapsed = datetime.now(timezone.utc) - start_time
+                    elapsed = now - parse_iso(started_at)
                     elapsed_str = format_elapsed(elapsed.total_seconds())
                 except Exception:
                     elapsed_str = "unknown"
@@ -86,12 +206,17 @@ def scan_sessions(config: dict) -> list[dict]:
     return sessions
 
 
+@functools.lru_cache(maxsize=ACTIVITY_STATE_CACHE_SIZE)
 def parse_activity_state(window_title: str, content_tail: str = "") -> tuple[str, str]:
     """Parse Claude Code window title and terminal content to extract activity state.
 
+    Results are memoized, so a window whose title and tail are unchanged
+    since the last poll is not re-scanned.
+
     Args:
         window_title: The iTerm window title
-        content_tail: The last ~5000 characters of terminal content
+        content_tail: The last ~5000 characters of terminal content (only
+            the final CONTENT_SCAN_CHARS are scanned for input prompts)
 
     Returns:
         Tuple of (activity_state, task_summary)
@@ -105,121 +230,27 @@ def parse_activity_state(window_title: str, content_tail: str = "") -> tuple[str
     if not window_title:
         return ("unknown", "Unknown")
 
-    # Braille spinner characters indicate processing (Claude's turn - working)
-    # Full Unicode braille pattern range
-    spinner_chars = set("⠁⠂⠃⠄⠅⠆⠇⠈⠉⠊⠋⠌⠍⠎⠏⠐⠑⠒⠓⠔⠕⠖⠗⠘⠙⠚⠛⠜⠝⠞⠟⠠⠡⠢⠣⠤⠥⠦⠧⠨⠩⠪⠫⠬⠭⠮⠯⠰⠱⠲⠳⠴⠵⠶⠷⠸⠹⠺⠻⠼⠽⠾⠿⡀⡄⡆⡇")
-    # Also common loading spinners
-    spinner_chars |= set("◐◑◒◓◴◵◶◷⣾⣽⣻⢿⡿⣟⣯⣷⠋⠙⠹⠸⠼⠴⠦⠧⠇⠏")
-
-    # Star/asterisk/prompt indicators = session not processing
-    idle_chars = set("✳✱✲✴✵✶✷✸*›❯>$▶")
-
-    # Permission/warning characters (used for title cleanup)
-    permission_chars = set("?❓⚠️🔒⏸")
-
-    # Patterns in terminal content that indicate Claude is waiting for user input
-    # These appear when Claude asks a question or needs permission
-    input_needed_patterns = [
-        # Claude Code built-in UI patterns
-        "Esc to cancel",
-        "Tab to add additional instructions",
-        "Do you want to proceed?",
-        "Yes, and don't ask again",
-        "Yes, and always allow",
-        "Allow once",
-        "Allow for this session",
-        "❯ 1.",  # Numbered choice prompt
-        "❯ Yes",
-        "❯ No",
-        # AskUserQuestion tool patterns
-        "Enter to select",
-        "to navigate",
-        "Type something",
-        # Yes/no prompt variations
-        "[y/n]",
-        "[Y/n]",
-        "[y/N]",
-        "(y/n)",
-        "(Y/n)",
-        "(y/N)",
-        "[yes/no]",
-        "(yes/no)",
-        "yes or no",
-        "y or n?",
-        # Proceed/continue prompts
-        "proceed?",
-        "continue?",
-        "should I proceed",
-        "should I continue",
-        "shall I proceed",
-        "shall I continue",
-        "want me to proceed",
-        "want me to continue",
-        "ready to proceed",
-        # Confirmation prompts
-        "confirm?",
-        "is this correct",
-        "is that correct",
-        "does this look",
-        "sound good?",
-        "look good?",
-        "looks good?",
-        "make sense?",
-        "what do you think",
-        # Choice/selection prompts
-        "which option",
-        "which approach",
-        "what would you prefer",
-        "would you prefer",
-        "please choose",
-        "please select",
-        "your choice",
-        # Permission prompts
-        "may I",
-        "can I proceed",
-        "shall I",
-        "would you like me to",
-        "do you want me to",
-        # Waiting for input
-        "waiting for your",
-        "let me know",
-        "please respond",
-        "your input",
-        "your feedback",
-        "awaiting your",
-        # Checkpoint patterns (like the example)
-        "CHECKPOINT:",
-        "checkpoint:",
-    ]
-
-    # Get the first character to determine base state
-    first_char = window_title[0] if window_title else ""
-
-    # Check content for input_needed patterns
-    content_lower = content_tail.lower()
-    is_input_needed = any(pattern.lower() in content_lower for pattern in input_needed_patterns)
-
-    if first_char in spinner_chars:
+    # The first character determines the base state (None if unrecognized)
+    base_state = _TITLE_PREFIX_STATES.get(window_title[0])
+
+    if base_state == "processing":
+        # A spinner wins outright, so the content is not scanned
         activity_state = "processing"
-    elif first_char in idle_chars:
-        # Check terminal content to distinguish input_needed vs idle
-        activity_state = "input_needed" if is_input_needed else "idle"
-    elif is_input_needed:
-        # Even if first char is unrecognized, if content shows input prompts, mark as input_needed
+    elif content_tail and _INPUT_NEEDED_RE.search(
+        content_tail, max(0, len(content_tail) - CONTENT_SCAN_CHARS)
+    ):
+        # Idle prompt or unrecognized first char, but the end of the content
+        # shows an input prompt (pos avoids a slice copy)
         activity_state = "input_needed"
     else:
-        activity_state = "unknown"
+        activity_state = base_state or "unknown"
 
     # Extract task summary (remove status prefix and clean up)
     # Remove the UUID from the title if present
-    uuid_pattern = re.compile(
-        r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}",
-        re.IGNORECASE,
-    )
-    cleaned = uuid_pattern.sub("", window_title).strip()
+    cleaned = _UUID_RE.sub("", window_title).strip()
 
     # Remove the status prefix character
-    if cleaned and cleaned[0] in spinner_chars | idle_chars | permission_chars:
+    if cleaned and cleaned[0] in _STATUS_PREFIX_CHARS:
         cleaned = cleaned[1:].strip()
 
     # Clean up common prefixes/suffixes
@@ -255,9 +286,7 @@ def format_elapsed(seconds: float) -> str:
     elif seconds < 60:
         return f"{int(seconds)}s"
     elif seconds < 3600:
-        minutes = int(seconds / 60)
-        return f"{minutes}m"
+        return f"{int(seconds) // 60}m"
     else:
-        hours = int(seconds / 3600)
-        minutes = int((seconds % 3600) / 60)
-        return f"{hours}h {minutes}m"
+        hours, remainder = divmod(int(seconds), 3600)
+        return f"{hours}h {remainder // 60}m"
@@ -0,0 +1,274 @@
+"""YAML storage helpers for Claude Monitor.
+
+This module handles:
+- Parsing YAML files with the libyaml C loader when available
+- Serializing data with the libyaml C dumper when available
+- Caching parsed documents until the file on disk changes
+- JSON load/dump for machine-only sidecar files
+- Atomic file writes (temp file + rename)
+"""
+
+import copy
+import json
+import mmap
+import os
+import stat
+import threading
+from pathlib import Path
+from typing import Any, Callable
+
+import yaml
+
+# libyaml bindings ship with the PyYAML wheels; fall back to pure Python
+try:
+    from yaml import CSafeDumper as YamlDumper
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:  # pragma: no cover - depends on how PyYAML was built
+    from yaml import SafeDumper as YamlDumper
+    from yaml import SafeLoader as YamlLoader
+
+# orjson is optional; the stdlib json module produces the same documents
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+# Files at least this large are parsed straight from a read-only memory map
+MMAP_MIN_BYTES = 64 * 1024
+
+# Parsed documents keyed by path -> (mtime_ns, size, data)
+_parse_cache: dict[str, tuple[int, int, Any]] = {}
+_parse_cache_lock = threading.Lock()
+
+
+# =============================================================================
+# YAML Load / Dump
+# =============================================================================
+
+
+def load_yaml(path: Path) -> Any:
+    """Parse a YAML file.
+
+    Reads raw bytes so the C loader can decode and parse in one pass. Large
+    files are parsed from a memory map of the page cache instead of being
+    read into a bytes object first.
+
+    Args:
+        path: Path to the YAML file
+
+    Returns:
+        Parsed document (None for an empty file)
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0 or size < MMAP_MIN_BYTES:
+            return yaml.load(f.read(), Loader=YamlLoader)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return yaml.load(mapped, Loader=YamlLoader)
+
+
+def dump_yaml(data: Any, allow_unicode: bool = True) -> bytes:
+    """Serialize data to block-style YAML, preserving key order.
+
+    The emitter encodes straight to UTF-8, so the result can be written
+    to disk without a separate str -> bytes pass.
+
+    Args:
+        data: Data to serialize
+        allow_unicode: Emit non-ASCII characters unescaped
+
+    Returns:
+        YAML document as UTF-8 bytes
+    """
+    return yaml.dump(
+        data,
+        Dumper=YamlDumper,
+        default_flow_style=False,
+        sort_keys=False,
+        allow_unicode=allow_unicode,
+        encoding="utf-8",
+    )
+
+
+# =============================================================================
+# JSON Load / Dump
+# =============================================================================
+
+
+def parse_json(raw: bytes) -> Any:
+    """Parse a JSON document from bytes (with orjson when installed).
+
+    Args:
+        raw: UTF-8 encoded JSON
+
+    Returns:
+        Parsed document
+
+    Raises:
+        ValueError: If raw is not valid JSON
+    """
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def load_json(path: Path) -> Any:
+    """Parse a JSON file.
+
+    Args:
+        path: Path to the JSON file
+
+    Returns:
+        Parsed document
+    """
+    return parse_json(path.read_bytes())
+
+
+def dump_json(data: Any) -> bytes:
+    """Serialize data to compact JSON (with orjson when installed).
+
+    Values JSON cannot represent (e.g. dates parsed from legacy YAML) are
+    written as strings.
+
+    Args:
+        data: Data to serialize
+
+    Returns:
+        JSON document as UTF-8 bytes
+    """
+    if orjson is not None:
+        # Match the stdlib output: str() for dates, non-string keys allowed
+        return orjson.dumps(
+            data,
+            default=str,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+        )
+    return json.dumps(
+        data, separators=(",", ":"), ensure_ascii=False, default=str
+    ).encode("utf-8")
+
+
+# =============================================================================
+# Atomic Writes
+# =============================================================================
+
+
+def write_atomic(path: Path, content: bytes, fsync: bool = True) -> None:
+    """Replace a file's contents so readers see either the old or new file.
+
+    The content is written to a temp file in the same directory, which is
+    then renamed over path. A crash mid-write leaves the previous file
+    intact rather than a truncated one. A symlinked path is written through
+    to its target, and an existing file keeps its permission bits.
+
+    Args:
+        path: Path to the file to write
+        content: New file contents
+        fsync: Flush the temp file to disk before the rename
+
+    Raises:
+        OSError: If the file cannot be written
+    """
+    # Replace the symlink's target, not the link itself
+    path = Path(os.path.realpath(path))
+    try:
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        mode = None
+
+    # Unique per thread so concurrent writers never share a temp file
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+    try:
+        with open(fd, "wb") as f:
+            if mode is not None:
+                # Keep e.g. a 0600 config.yaml private; umask doesn't apply here
+                os.fchmod(f.fileno(), mode)
+            f.write(content)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+# =============================================================================
+# Parse Cache
+# =============================================================================
+
+
+def load_yaml_cached(path: Path, readonly: bool = False) -> Any:
+    """Parse a YAML file, reusing the previous result if the file is unchanged.
+
+    The cache is keyed on the file's mtime and size, so edits made outside
+    this process are picked up on the next call.
+
+    Args:
+        path: Path to the YAML file
+        readonly: Return the cached object itself instead of a deep copy.
+            Callers passing True must not mutate the result.
+
+    Returns:
+        Parsed document (None for an empty file)
+    """
+    return _load_cached(path, load_yaml, readonly)
+
+
+def load_json_cached(path: Path, readonly: bool = False) -> Any:
+    """Parse a JSON file, reusing the previous result if the file is unchanged.
+
+    Args:
+        path: Path to the JSON file
+        readonly: Return the cached object itself instead of a deep copy.
+            Callers passing True must not mutate the result.
+
+    Returns:
+        Parsed document
+    """
+    return _load_cached(path, load_json, readonly)
+
+
+def _load_cached(path: Path, loader: Callable[[Path], Any], readonly: bool) -> Any:
+    """Parse a file with loader, keyed on (mtime_ns, size) in the parse cache."""
+    key = str(path)
+    file_stat = path.stat()
+
+    with _parse_cache_lock:
+        entry = _parse_cache.get(key)
+
+    if entry is not None and entry[0] == file_stat.st_mtime_ns and entry[1] == file_stat.st_size:
+        data = entry[2]
+    else:
+        data = loader(path)
+        with _parse_cache_lock:
+            _parse_cache[key] = (file_stat.st_mtime_ns, file_stat.st_size, data)
+
+    return data if readonly else copy.deepcopy(data)
+
+
+def prime_parse_cache(path: Path, data: Any) -> None:
+    """Record data as the parse of a file that was just written from it.
+
+    Lets the next cached load of a file this process wrote skip the parse.
+    A copy is stored, so the caller may keep mutating data.
+
+    Args:
+        path: Path to the YAML or JSON file
+        data: Data the file was serialized from
+    """
+    file_stat = path.stat()
+    data = copy.deepcopy(data)
+    with _parse_cache_lock:
+        _parse_cache[str(path)] = (file_stat.st_mtime_ns, file_stat.st_size, data)
+
+
+def invalidate_parse_cache(path: Path) -> None:
+    """Drop any cached parse of a file, e.g. after writing it.
+
+    Args:
+        path: Path to the YAML or JSON file
+    """
+    with _parse_cache_lock:
+        _parse_cache.pop(str(path), None)
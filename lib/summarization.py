@@ -14,7 +14,7 @@ from pathlib import Path
 from typing import Generator, Optional
 
 from config import load_config
-from lib.projects import load_project_data, save_project_data
+from lib.projects import batched_project_saves, load_project_data, save_project_data
 
 # Path to Claude Code's projects directory
 CLAUDE_PROJECTS_DIR = Path.home() / ".claude" / "projects"
@@ -448,13 +448,17 @@ def update_project_state(project_name: str, session_summary: dict) -> bool:
     if project_data is None:
         return False
 
-    # Update state section
-    project_data["state"] = {
+    state = {
         "last_session_id": session_summary["session_id"],
         "last_session_ended": session_summary["ended_at"],
         "last_session_summary": session_summary["summary"],
         "status": "idle"  # Session has ended
     }
+    if project_data.get("state") == state:
+        return True  # Already recorded, skip
+
+    # Update state section
+    project_data["state"] = state
 
     return save_project_data(project_name, project_data)
 
@@ -482,19 +486,19 @@ def add_recent_session(project_name: str, session_summary: dict) -> tuple[bool,
     if "recent_sessions" not in project_data or not isinstance(project_data["recent_sessions"], list):
         project_data["recent_sessions"] = []
 
+    recent_sessions = project_data["recent_sessions"]
+
     # Check if this session is already recorded
-    existing_ids = [s.get("session_id") for s in project_data["recent_sessions"]]
+    existing_ids = {s.get("session_id") for s in recent_sessions}
     if session_summary["session_id"] in existing_ids:
         return True, []  # Already recorded, skip
 
     # Add new session to the front
-    project_data["recent_sessions"].insert(0, session_summary)
+    recent_sessions.insert(0, session_summary)
 
-    # Enforce FIFO limit and capture removed sessions
-    removed_sessions = []
-    if len(project_data["recent_sessions"]) > MAX_RECENT_SESSIONS:
-        removed_sessions = project_data["recent_sessions"][MAX_RECENT_SESSIONS:]
-        project_data["recent_sessions"] = project_data["recent_sessions"][:MAX_RECENT_SESSIONS]
+    # Enforce FIFO limit in place and capture removed sessions
+    removed_sessions = recent_sessions[MAX_RECENT_SESSIONS:]
+    del recent_sessions[MAX_RECENT_SESSIONS:]
 
     success = save_project_data(project_name, project_data)
     return success, removed_sessions if success else []
@@ -527,11 +531,17 @@ def process_session_end(
         print(f"Warning: Could not summarise session {session_uuid} for {project_name}")
         return None
 
-    # Update state
-    update_project_state(project_name, summary)
+    # Update state and recent sessions with a single write of the project YAML
+    with batched_project_saves() as failed_saves:
+        update_project_state(project_name, summary)
+
+        # Add to recent sessions (may trigger FIFO removal)
+        success, removed_sessions = add_recent_session(project_name, summary)
 
-    # Add to recent sessions (may trigger FIFO removal)
-    success, removed_sessions = add_recent_session(project_name, summary)
+    # Sessions trimmed from the window only leave the YAML once it is written
+    if failed_saves:
+        print(f"Warning: Could not save session {session_uuid[:8]}... for {project_name}")
+        return None
 
     # Queue removed sessions for compression
     if compression_queue_callback:
@@ -0,0 +1,55 @@
+"""UTC timestamp helpers for Claude Monitor.
+
+This module handles:
+- Formatting the current UTC time as an ISO 8601 string
+- Parsing ISO 8601 timestamps that repeat across polls
+"""
+
+import functools
+import time
+from datetime import datetime
+
+# Last formatted second: (epoch seconds, "YYYY-MM-DDTHH:MM:SS")
+_second_prefix: tuple[int, str] = (-1, "")
+
+
+def utc_now_iso(z_suffix: bool = False) -> str:
+    """Get the current UTC time as an ISO 8601 string with microseconds.
+
+    The date/time prefix is cached per second, so calls within the same
+    second only format the fractional part.
+
+    Args:
+        z_suffix: End with "Z" instead of "+00:00"
+
+    Returns:
+        Timestamp such as "2026-01-20T10:00:00.123456+00:00"
+    """
+    global _second_prefix
+
+    seconds, nanos = divmod(time.time_ns(), 1_000_000_000)
+    cached_seconds, prefix = _second_prefix
+    if seconds != cached_seconds:
+        prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(seconds))
+        _second_prefix = (seconds, prefix)
+
+    return f"{prefix}.{nanos // 1000:06d}{'Z' if z_suffix else '+00:00'}"
+
+
+@functools.lru_cache(maxsize=1024)
+def parse_iso(stamp: str) -> datetime:
+    """Parse an ISO 8601 timestamp, accepting a trailing "Z" for UTC.
+
+    Results are memoized: the same session start times are parsed on every
+    poll, and datetimes are immutable so sharing them is safe.
+
+    Args:
+        stamp: Timestamp such as "2026-01-20T10:00:00Z"
+
+    Returns:
+        Parsed datetime
+
+    Raises:
+        ValueError: If stamp is not a valid ISO 8601 timestamp
+    """
+    return datetime.fromisoformat(stamp.replace("Z", "+00:00"))
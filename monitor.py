@@ -10,6 +10,8 @@ in modules under lib/:
 - lib/projects.py - Project data, roadmap, and CLAUDE.md parsing
 - lib/summarization.py - JSONL parsing and session summarization
 - lib/compression.py - History compression with OpenRouter API
+- lib/storage.py - YAML load/dump helpers
+- lib/timestamps.py - UTC timestamp helpers
 
 Configuration is in config.py.
 HTML template is in templates/index.html.
@@ -19,8 +21,6 @@ Usage:
     # Then open http://localhost:5050 in your browser
 """
 
-from datetime import datetime, timezone
-
 import markdown
 from flask import Flask, jsonify, render_template, request
 
@@ -58,6 +58,7 @@ from lib.notifications import (
     set_notifications_enabled,
 )
 from lib.projects import (
+    batched_project_saves,
     calculate_staleness,
     generate_reboot_briefing,
     get_readme_content,
@@ -68,6 +69,7 @@ from lib.projects import (
     validate_roadmap_data,
 )
 from lib.sessions import scan_sessions
+from lib.timestamps import utc_now_iso
 from lib.summarization import (
     find_session_log_file,
     summarise_session,
@@ -446,7 +448,7 @@ def compute_priorities(force_refresh: bool = False) -> dict:
             "success": True,
             "priorities": [],
             "metadata": {
-                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "timestamp": utc_now_iso(),
                 "headspace_summary": context.get("headspace", {}).get("current_focus") if context.get("headspace") else None,
                 "cache_hit": False,
                 "soft_transition_pending": False
@@ -473,7 +475,7 @@ def compute_priorities(force_refresh: bool = False) -> dict:
             "success": True,
             "priorities": priorities,
             "metadata": {
-                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "timestamp": utc_now_iso(),
                 "headspace_summary": context.get("headspace", {}).get("current_focus") if context.get("headspace") else None,
                 "cache_hit": False,
                 "soft_transition_pending": False,
@@ -502,7 +504,7 @@ def compute_priorities(force_refresh: bool = False) -> dict:
         "success": True,
         "priorities": priorities,
         "metadata": {
-            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "timestamp": utc_now_iso(),
             "headspace_summary": headspace_summary,
             "cache_hit": False,
             "soft_transition_pending": soft_pending
@@ -536,9 +538,16 @@ def api_session_summarise(session_id: str):
             # Found the session, generate summary
             summary = summarise_session(project_path, session_id)
             if summary:
-                # Update project YAML
-                update_project_state(project_name, summary)
-                add_recent_session(project_name, summary)
+                # Update project YAML (one write for both changes)
+                with batched_project_saves() as failed_saves:
+                    update_project_state(project_name, summary)
+                    add_recent_session(project_name, summary)
+
+                if failed_saves:
+                    return jsonify({
+                        "success": False,
+                        "error": f"Failed to save summary for session {session_id}"
+                    }), 500
 
                 return jsonify({
                     "success": True,
@@ -1,11 +1,9 @@
 """Tests for project data management functionality."""
 
-import os
-import tempfile
-import shutil
+import json
+import time
 from datetime import datetime, timezone
-from pathlib import Path
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
 
 import pytest
 import yaml
@@ -17,6 +15,7 @@ from lib.projects import (
     get_project_data_path,
     load_project_data,
     save_project_data,
+    batched_project_saves,
     list_project_data,
     parse_claude_md,
     register_project,
@@ -36,12 +35,14 @@ from lib.compression import (
     get_openrouter_config,
     call_openrouter,
     build_compression_prompt,
+    build_batch_compression_prompt,
     compress_session,
     process_compression_queue,
+    process_all_compression_queues,
 )
 
 # Session summarization functions
-from lib.summarization import add_recent_session
+from lib.summarization import add_recent_session, process_session_end, update_project_state
 
 # Headspace functions
 from lib.headspace import (
@@ -65,8 +66,137 @@ from lib.headspace import (
     apply_soft_transition,
 )
 
-# Main app functions
-from monitor import compute_priorities
+# Session activity parsing
+from lib.sessions import format_elapsed, parse_activity_state
+
+# Timestamp helpers
+from lib.timestamps import parse_iso, utc_now_iso
+
+# Modules patched by attribute reference (monkeypatch.setattr(module, "name", ...))
+import lib.compression
+import lib.headspace
+import lib.projects
+import lib.sessions
+import lib.storage
+import lib.summarization
+import monitor
+
+# Prefer the libyaml C loader/dumper when PyYAML was built with them
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+_YAML_DUMPER = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+# Static project documents, serialized once at import and written as bytes.
+# JSON is a subset of YAML, so the stdlib encoder stands in for the dumper.
+_PROJECT_FIXTURES = {
+    "test": {"name": "Test", "path": "/test", "goal": "Test goal"},
+    "path-test": {"name": "PathTest", "path": "/path-test"},
+    **{name: {"name": name, "path": f"/{name}"} for name in ("project-a", "project-b", "project-c")},
+}
+_PROJECT_FIXTURE_YAML = {
+    slug: json.dumps(data).encode() for slug, data in _PROJECT_FIXTURES.items()
+}
+
+
+def _load_yaml(path):
+    """Parse a YAML file from raw bytes with the fastest safe loader."""
+    return yaml.load(path.read_bytes(), Loader=_YAML_LOADER)
+
+
+# Shared UTC tzinfo and the instant that frozen_now pins the clock to
+_UTC = timezone.utc
+_FROZEN_NOW = datetime(2024, 1, 1, tzinfo=_UTC)
+
+
+class _FrozenDatetime(datetime):
+    """datetime whose now() always returns _FROZEN_NOW."""
+
+    @classmethod
+    def now(cls, tz=None):
+        return _FROZEN_NOW
+
+
+# Trivial stand-ins for patched functions, shared instead of per-test lambdas
+def _return_true():
+    return True
+
+
+def _return_false():
+    return False
+
+
+def _return_none():
+    return None
+
+
+def _return_empty_dict():
+    return {}
+
+
+def _scan_no_sessions(config):
+    return []
+
+
+def _failing_write(path, content, fsync=True):
+    """Stand-in for write_atomic() on a full disk."""
+    raise OSError("disk full")
+
+
+# Stand-ins for load_config(), defined once and shared by the tests that patch it
+# (an empty config.yaml is _return_empty_dict)
+def _load_openrouter_config():
+    """Return a config with only an OpenRouter API key set."""
+    return {"openrouter": {"api_key": "test-key"}}
+
+
+def _load_history_enabled_config():
+    """Return a config with headspace history tracking enabled."""
+    return {"headspace": {"history_enabled": True}}
+
+
+class _StubResponse:
+    """Minimal stand-in for the requests.Response attributes call_openrouter() reads."""
+
+    def __init__(self, status_code, content=b""):
+        self.status_code = status_code
+        self.content = content
+
+
+# UTF-8 YAML for fixture documents, keyed by their repr (reused across tests)
+_YAML_BYTES_CACHE = {}
+
+
+def _write_yaml(path, data):
+    """Write a fixture document as YAML, serializing and encoding each distinct document once."""
+    key = repr(data)
+    blob = _YAML_BYTES_CACHE.get(key)
+    if blob is None:
+        blob = _YAML_BYTES_CACHE[key] = yaml.dump(data, Dumper=_YAML_DUMPER).encode()
+    path.write_bytes(blob)
+
+
+def _load_queue_file(project_file):
+    """Read the compression queue sidecar that sits next to a project YAML.
+
+    The sidecar maps session_id to entry in queue order; entries are returned
+    as a list.
+    """
+    return list(json.loads(project_file.with_suffix(".queue.json").read_bytes()).values())
+
+
+def _stub_call_openrouter(messages, model=None):
+    """Stand-in for monitor.call_openrouter that fails without network I/O."""
+    return None, "stubbed"
+
+
+@pytest.fixture(autouse=True, scope="session")
+def _block_openrouter():
+    """Keep the priorities code in monitor from reaching OpenRouter.
+
+    Tests can still override monitor.call_openrouter with monkeypatch.
+    """
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(monitor, "call_openrouter", _stub_call_openrouter)
+        yield
 
 
 @pytest.fixture
@@ -74,10 +204,76 @@ def temp_data_dir(tmp_path, monkeypatch):
     """Create a temporary data directory for testing."""
     temp_projects_dir = tmp_path / "data" / "projects"
     temp_projects_dir.mkdir(parents=True)
-    monkeypatch.setattr("lib.projects.PROJECT_DATA_DIR", temp_projects_dir)
+    monkeypatch.setattr(lib.projects, "PROJECT_DATA_DIR", temp_projects_dir)
     return temp_projects_dir
 
 
+@pytest.fixture(scope="module")
+def shared_data_dir(tmp_path_factory):
+    """Create a data directory shared by read-only tests in this module.
+
+    Tests that only inspect paths or read from the empty directory never
+    write to it, so it is created once instead of per test.
+    """
+    shared_projects_dir = tmp_path_factory.mktemp("projects", numbered=False)
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(lib.projects, "PROJECT_DATA_DIR", shared_projects_dir)
+        yield shared_projects_dir
+
+
+# CLAUDE.md contents by variant (None means the project has no CLAUDE.md)
+_CLAUDE_MD_VARIANTS = {
+    "valid": """# Project Name
+
+## Project Overview
+
+This is a test project for demonstration.
+
+## Tech Stack
+
+- Python 3.10+
+- Flask
+- PyYAML
+
+## Other Section
+
+More content here.
+""",
+    "missing": None,
+    "missing-sections": """# Project Name
+
+## Some Other Section
+
+Content here.
+""",
+    "malformed": "Just some random text without any headers",
+    "empty": "",
+}
+
+
+@pytest.fixture(scope="module")
+def claude_md_projects(tmp_path_factory):
+    """Create one read-only project directory per CLAUDE.md variant.
+
+    Returns:
+        Dict mapping variant name to its project directory
+    """
+    projects = {}
+    for variant, content in _CLAUDE_MD_VARIANTS.items():
+        project_dir = tmp_path_factory.mktemp(f"claude-md-{variant}")
+        if content is not None:
+            (project_dir / "CLAUDE.md").write_bytes(content.encode())
+        projects[variant] = project_dir
+    return projects
+
+
+@pytest.fixture
+def frozen_now(monkeypatch):
+    """Pin the priorities cache clock to a fixed instant and return it."""
+    monkeypatch.setattr(lib.headspace, "datetime", _FrozenDatetime)
+    return _FROZEN_NOW
+
+
 @pytest.fixture
 def temp_project_dir(tmp_path):
     """Create a temporary project directory for testing."""
@@ -89,41 +285,36 @@ def temp_project_dir(tmp_path):
 class TestSlugifyName:
     """Tests for slugify_name() function."""
 
-    def test_lowercase_conversion(self):
-        """Test that names are converted to lowercase."""
-        assert slugify_name("MyProject") == "myproject"
-        assert slugify_name("UPPERCASE") == "uppercase"
-
-    def test_spaces_to_hyphens(self):
-        """Test that spaces are converted to hyphens."""
-        assert slugify_name("My Project") == "my-project"
-        assert slugify_name("A B C") == "a-b-c"
-
-    def test_combined_conversion(self):
-        """Test both lowercase and hyphen conversion together."""
-        assert slugify_name("My Cool Project") == "my-cool-project"
-
-    def test_already_slugified(self):
-        """Test that already slugified names are unchanged."""
-        assert slugify_name("already-slugified") == "already-slugified"
-
-    def test_empty_string(self):
-        """Test handling of empty string."""
-        assert slugify_name("") == ""
-
-
+    @pytest.mark.parametrize("name,expected", [
+        ("MyProject", "myproject"),
+        ("UPPERCASE", "uppercase"),
+        ("My Project", "my-project"),
+        ("A B C", "a-b-c"),
+        ("My Cool Project", "my-cool-project"),
+        ("already-slugified", "already-slugified"),
+        ("", ""),
+    ], ids=[
+        "lowercase", "uppercase", "spaces", "multiple-spaces",
+        "combined", "already-slugified", "empty-string",
+    ])
+    def test_slugify_name(self, name, expected):
+        """Test lowercase conversion and spaces-to-hyphens in one pass."""
+        assert slugify_name(name) == expected
+
+
+@pytest.mark.xdist_group("shared_data_dir")
 class TestProjectDataPath:
     """Tests for get_project_data_path() function."""
 
-    def test_returns_correct_path(self, temp_data_dir, monkeypatch):
+    def test_returns_correct_path(self, shared_data_dir):
         """Test that correct path is returned."""
         path = get_project_data_path("my-project")
-        assert path == temp_data_dir / "my-project.yaml"
+        assert path == shared_data_dir / "my-project.yaml"
 
-    def test_slugifies_name(self, temp_data_dir, monkeypatch):
+    def test_slugifies_name(self, shared_data_dir):
         """Test that name is slugified in path."""
         path = get_project_data_path("My Project")
-        assert path == temp_data_dir / "my-project.yaml"
+        assert path == shared_data_dir / "my-project.yaml"
 
 
 class TestLoadProjectData:
@@ -132,30 +323,55 @@ class TestLoadProjectData:
     def test_load_existing_file(self, temp_data_dir):
         """Test loading an existing project data file."""
         # Create a test file
-        test_data = {"name": "Test", "path": "/test", "goal": "Test goal"}
         test_file = temp_data_dir / "test.yaml"
-        test_file.write_text(yaml.dump(test_data))
+        test_file.write_bytes(_PROJECT_FIXTURE_YAML["test"])
 
         result = load_project_data("test")
         assert result is not None
         assert result["name"] == "Test"
         assert result["goal"] == "Test goal"
 
-    def test_load_missing_file(self, temp_data_dir):
+    @pytest.mark.xdist_group("shared_data_dir")
+    def test_load_missing_file(self, shared_data_dir):
         """Test loading a non-existent file returns None."""
         result = load_project_data("nonexistent")
         assert result is None
 
     def test_load_by_path(self, temp_data_dir):
         """Test loading by direct file path."""
-        test_data = {"name": "PathTest", "path": "/path-test"}
         test_file = temp_data_dir / "path-test.yaml"
-        test_file.write_text(yaml.dump(test_data))
+        test_file.write_bytes(_PROJECT_FIXTURE_YAML["path-test"])
 
         result = load_project_data(str(test_file))
         assert result is not None
         assert result["name"] == "PathTest"
 
+    def test_load_memory_mapped_file(self, temp_data_dir, monkeypatch):
+        """Test that files above the mmap threshold parse the same way."""
+        monkeypatch.setattr(lib.storage, "MMAP_MIN_BYTES", 1)
+        (temp_data_dir / "test.yaml").write_bytes(_PROJECT_FIXTURE_YAML["test"])
+
+        assert load_project_data("test") == _PROJECT_FIXTURES["test"]
+
+    def test_cached_load_returns_private_copy(self, temp_data_dir):
+        """Test that mutating a loaded dict does not leak into later loads."""
+        (temp_data_dir / "test.yaml").write_bytes(_PROJECT_FIXTURE_YAML["test"])
+
+        first = load_project_data("test")
+        first["goal"] = "Mutated"
+
+        assert load_project_data("test")["goal"] == "Test goal"
+
+    def test_reloads_after_external_change(self, temp_data_dir):
+        """Test that edits made outside save_project_data are picked up."""
+        test_file = temp_data_dir / "test.yaml"
+        test_file.write_bytes(_PROJECT_FIXTURE_YAML["test"])
+        assert load_project_data("test")["goal"] == "Test goal"
+
+        _write_yaml(test_file, {"name": "Test", "goal": "Edited elsewhere"})
+
+        assert load_project_data("test")["goal"] == "Edited elsewhere"
+
 
 class TestSaveProjectData:
     """Tests for save_project_data() function."""
@@ -176,7 +392,7 @@ class TestSaveProjectData:
         saved_file = temp_data_dir / "save-test.yaml"
         assert saved_file.exists()
 
-        loaded = yaml.safe_load(saved_file.read_text())
+        loaded = _load_yaml(saved_file)
         assert loaded["name"] == "SaveTest"
 
     def test_updates_refreshed_at(self, temp_data_dir):
@@ -187,16 +403,68 @@ class TestSaveProjectData:
             "context": {"refreshed_at": "2020-01-01T00:00:00+00:00"},
         }
 
-        before = datetime.now(timezone.utc)
+        before = datetime.now(_UTC)
         save_project_data("refresh-test", test_data)
-        after = datetime.now(timezone.utc)
+        after = datetime.now(_UTC)
 
         saved_file = temp_data_dir / "refresh-test.yaml"
-        loaded = yaml.safe_load(saved_file.read_text())
+        loaded = _load_yaml(saved_file)
 
         refreshed = datetime.fromisoformat(loaded["context"]["refreshed_at"])
         assert before <= refreshed <= after
 
+    def test_unchanged_data_still_refreshes_timestamp(self, temp_data_dir):
+        """Test that saving unchanged data still rewrites refreshed_at."""
+        saved_file = temp_data_dir / "same-test.yaml"
+        _write_yaml(saved_file, {"name": "SameTest", "context": {"refreshed_at": "2020-01-01T00:00:00Z"}})
+
+        assert save_project_data("same-test", load_project_data("same-test")) is True
+        assert _load_yaml(saved_file)["context"]["refreshed_at"] != "2020-01-01T00:00:00Z"
+
+    def test_repeated_state_update_is_not_rewritten(self, temp_data_dir):
+        """Test that recording the same session outcome twice writes the file once."""
+        save_project_data("state-test", {"name": "StateTest"})
+        summary = {"session_id": "s1", "ended_at": "2026-01-01T00:00:00Z", "summary": "Done"}
+        assert update_project_state("state-test", summary) is True
+        saved_file = temp_data_dir / "state-test.yaml"
+        first_write = saved_file.read_bytes()
+
+        assert update_project_state("state-test", summary) is True
+        assert saved_file.read_bytes() == first_write
+
+    def test_save_replaces_file_atomically(self, temp_data_dir):
+        """Test that a rewrite replaces the file and leaves no temp files."""
+        save_project_data("atomic-test", {"name": "AtomicTest", "goal": "First"})
+        save_project_data("atomic-test", {"name": "AtomicTest", "goal": "Second"})
+
+        assert [p.name for p in temp_data_dir.iterdir()] == ["atomic-test.yaml"]
+        assert _load_yaml(temp_data_dir / "atomic-test.yaml")["goal"] == "Second"
+
+    def test_load_after_save_skips_parse(self, temp_data_dir, monkeypatch):
+        """Test that a save primes the parse cache with a private copy."""
+        test_data = {"name": "CacheTest", "goal": "Cached"}
+        save_project_data("cache-test", test_data)
+        test_data["goal"] = "Mutated after save"
+
+        def fail_parse(path):
+            raise AssertionError(f"unexpected parse of {path}")
+
+        monkeypatch.setattr(lib.storage, "load_yaml", fail_parse)
+        assert load_project_data("cache-test")["goal"] == "Cached"
+
+    def test_batched_saves_write_once_on_exit(self, temp_data_dir):
+        """Test that saves inside a batch are deferred and read back from the buffer."""
+        saved_file = temp_data_dir / "batch-test.yaml"
+
+        with batched_project_saves():
+            save_project_data("batch-test", {"name": "BatchTest", "goal": "First"})
+            data = load_project_data("batch-test")
+            data["goal"] = "Second"
+            save_project_data("batch-test", data)
+            assert not saved_file.exists()
+
+        assert _load_yaml(saved_file)["goal"] == "Second"
+
 
 class TestListProjectData:
     """Tests for list_project_data() function."""
@@ -206,73 +474,51 @@ class TestListProjectData:
         # Create test files
         for name in ["project-a", "project-b", "project-c"]:
             test_file = temp_data_dir / f"{name}.yaml"
-            test_file.write_text(yaml.dump({"name": name, "path": f"/{name}"}))
+            test_file.write_bytes(_PROJECT_FIXTURE_YAML[name])
 
         result = list_project_data()
         assert len(result) == 3
-        names = {p["name"] for p in result}
-        assert names == {"project-a", "project-b", "project-c"}
+        assert sorted(p["name"] for p in result) == ["project-a", "project-b", "project-c"]
 
-    def test_empty_directory(self, temp_data_dir):
+    @pytest.mark.xdist_group("shared_data_dir")
+    def test_empty_directory(self, shared_data_dir):
         """Test handling of empty directory."""
         result = list_project_data()
         assert result == []
 
 
+@pytest.mark.xdist_group("claude_md_projects")
 class TestParseClaudeMd:
     """Tests for parse_claude_md() function."""
 
-    def test_parses_valid_claude_md(self, temp_project_dir):
+    def test_parses_valid_claude_md(self, claude_md_projects):
         """Test parsing a valid CLAUDE.md file."""
-        claude_md = temp_project_dir / "CLAUDE.md"
-        claude_md.write_text("""# Project Name
-
-## Project Overview
-
-This is a test project for demonstration.
-
-## Tech Stack
-
-- Python 3.10+
-- Flask
-- PyYAML
-
-## Other Section
-
-More content here.
-""")
-
-        result = parse_claude_md(str(temp_project_dir))
+        result = parse_claude_md(str(claude_md_projects["valid"]))
         assert result["goal"] == "This is a test project for demonstration."
         assert "Python 3.10+" in result["tech_stack"]
         assert "Flask" in result["tech_stack"]
 
-    def test_missing_claude_md(self, temp_project_dir):
+    def test_missing_claude_md(self, claude_md_projects):
         """Test handling of missing CLAUDE.md."""
-        result = parse_claude_md(str(temp_project_dir))
+        result = parse_claude_md(str(claude_md_projects["missing"]))
         assert result["goal"] == ""
         assert result["tech_stack"] == ""
 
-    def test_missing_sections(self, temp_project_dir):
+    def test_missing_sections(self, claude_md_projects):
         """Test handling of CLAUDE.md with missing expected sections."""
-        claude_md = temp_project_dir / "CLAUDE.md"
-        claude_md.write_text("""# Project Name
-
-## Some Other Section
-
-Content here.
-""")
-
-        result = parse_claude_md(str(temp_project_dir))
+        result = parse_claude_md(str(claude_md_projects["missing-sections"]))
         assert result["goal"] == ""
         assert result["tech_stack"] == ""
 
-    def test_malformed_claude_md(self, temp_project_dir):
+    def test_malformed_claude_md(self, claude_md_projects):
         """Test handling of malformed CLAUDE.md content."""
-        claude_md = temp_project_dir / "CLAUDE.md"
-        claude_md.write_text("Just some random text without any headers")
+        result = parse_claude_md(str(claude_md_projects["malformed"]))
+        assert result["goal"] == ""
+        assert result["tech_stack"] == ""
 
-        result = parse_claude_md(str(temp_project_dir))
+    def test_empty_claude_md(self, claude_md_projects):
+        """Test handling of an empty CLAUDE.md file."""
+        result = parse_claude_md(str(claude_md_projects["empty"]))
         assert result["goal"] == ""
         assert result["tech_stack"] == ""
 
@@ -295,16 +541,16 @@ class TestRegisterProject:
 
         # Modify the data
         data_file = temp_data_dir / "existing.yaml"
-        data = yaml.safe_load(data_file.read_text())
+        data = _load_yaml(data_file)
         data["goal"] = "Modified goal"
-        data_file.write_text(yaml.dump(data))
+        _write_yaml(data_file, data)
 
         # Re-register
         result = register_project("existing", str(temp_project_dir))
         assert result is True
 
         # Verify data wasn't overwritten
-        reloaded = yaml.safe_load(data_file.read_text())
+        reloaded = _load_yaml(data_file)
         assert reloaded["goal"] == "Modified goal"
 
     def test_registration_with_missing_claude_md(self, temp_data_dir, temp_project_dir):
@@ -315,7 +561,7 @@ class TestRegisterProject:
         data_file = temp_data_dir / "no-claude.yaml"
         assert data_file.exists()
 
-        data = yaml.safe_load(data_file.read_text())
+        data = _load_yaml(data_file)
         assert data["goal"] == ""
         assert data["context"]["tech_stack"] == ""
 
@@ -324,7 +570,7 @@ class TestRegisterProject:
         register_project("with-placeholders", str(temp_project_dir))
 
         data_file = temp_data_dir / "with-placeholders.yaml"
-        data = yaml.safe_load(data_file.read_text())
+        data = _load_yaml(data_file)
 
         assert data["roadmap"] == {}
         assert data["state"] == {}
@@ -350,7 +596,7 @@ class TestRegisterAllProjects:
                 {"name": "Project B", "path": str(proj_b)},
             ]
         }
-        monkeypatch.setattr("lib.projects.load_config", lambda: mock_config)
+        monkeypatch.setattr(lib.projects, "load_config", lambda: mock_config)
 
         register_all_projects()
 
@@ -372,7 +618,7 @@ class TestCompressionQueue:
         # Create a project data file
         test_data = {"name": "queue-test", "path": "/queue-test"}
         test_file = temp_data_dir / "queue-test.yaml"
-        test_file.write_text(yaml.dump(test_data))
+        _write_yaml(test_file, test_data)
 
         session = {
             "session_id": "test-session-123",
@@ -383,18 +629,18 @@ class TestCompressionQueue:
         result = add_to_compression_queue("queue-test", session)
         assert result is True
 
-        # Verify it was added
-        data = yaml.safe_load(test_file.read_text())
-        assert "pending_compressions" in data
-        assert len(data["pending_compressions"]) == 1
-        assert data["pending_compressions"][0]["session_id"] == "test-session-123"
-        assert "queued_at" in data["pending_compressions"][0]
+        # Verify it was added to the sidecar, not the project YAML
+        queue = _load_queue_file(test_file)
+        assert len(queue) == 1
+        assert queue[0]["session_id"] == "test-session-123"
+        assert "queued_at" in queue[0]
+        assert "pending_compressions" not in _load_yaml(test_file)
 
     def test_add_to_compression_queue_no_duplicates(self, temp_data_dir):
         """Test that duplicate sessions aren't added to queue."""
         test_data = {"name": "dup-test", "path": "/dup-test"}
         test_file = temp_data_dir / "dup-test.yaml"
-        test_file.write_text(yaml.dump(test_data))
+        _write_yaml(test_file, test_data)
 
         session = {"session_id": "dup-session", "summary": "Test"}
 
@@ -402,8 +648,7 @@ class TestCompressionQueue:
         add_to_compression_queue("dup-test", session)
         add_to_compression_queue("dup-test", session)
 
-        data = yaml.safe_load(test_file.read_text())
-        assert len(data["pending_compressions"]) == 1
+        assert len(_load_queue_file(test_file)) == 1
 
     def test_get_pending_compressions(self, temp_data_dir):
         """Test retrieving pending compressions."""
@@ -416,7 +661,7 @@ class TestCompressionQueue:
             ]
         }
         test_file = temp_data_dir / "pending-test.yaml"
-        test_file.write_text(yaml.dump(test_data))
+        _write_yaml(test_file, test_data)
 
         result = get_pending_compressions("pending-test")
         assert len(result) == 2
@@ -426,7 +671,7 @@ class TestCompressionQueue:
         """Test getting pending compressions from empty queue."""
         test_data = {"name": "empty-test", "path": "/empty-test"}
         test_file = temp_data_dir / "empty-test.yaml"
-        test_file.write_text(yaml.dump(test_data))
+        _write_yaml(test_file, test_data)
 
         result = get_pending_compressions("empty-test")
         assert result == []
@@ -442,14 +687,17 @@ class TestCompressionQueue:
             ]
         }
         test_file = temp_data_dir / "remove-test.yaml"
-        test_file.write_text(yaml.dump(test_data))
+        _write_yaml(test_file, test_data)
 
         result = remove_from_compression_queue("remove-test", "remove-me")
         assert result is True
 
-        data = yaml.safe_load(test_file.read_text())
-        assert len(data["pending_compressions"]) == 1
-        assert data["pending_compressions"][0]["session_id"] == "keep-me"
+        queue = _load_queue_file(test_file)
+        assert len(queue) == 1
+        assert queue[0]["session_id"] == "keep-me"
+
+        # The legacy YAML queue is dropped once migrated to the sidecar
+        assert "pending_compressions" not in _load_yaml(test_file)
 
 
 class TestHistoryOperations:
@@ -459,7 +707,7 @@ class TestHistoryOperations:
         """Test getting history from project with no history."""
         test_data = {"name": "no-history", "path": "/no-history"}
         test_file = temp_data_dir / "no-history.yaml"
-        test_file.write_text(yaml.dump(test_data))
+        _write_yaml(test_file, test_data)
 
         result = get_project_history("no-history")
         assert result["summary"] == ""
@@ -476,7 +724,7 @@ class TestHistoryOperations:
             }
         }
         test_file = temp_data_dir / "has-history.yaml"
-        test_file.write_text(yaml.dump(test_data))
+        _write_yaml(test_file, test_data)
 
         result = get_project_history("has-history")
         assert result["summary"] == "Previous work summary"
@@ -486,12 +734,12 @@ class TestHistoryOperations:
         """Test updating project history."""
         test_data = {"name": "update-hist", "path": "/update-hist"}
         test_file = temp_data_dir / "update-hist.yaml"
-        test_file.write_text(yaml.dump(test_data))
+        _write_yaml(test_file, test_data)
 
         result = update_project_history("update-hist", "New summary narrative")
         assert result is True
 
-        data = yaml.safe_load(test_file.read_text())
+        data = _load_yaml(test_file)
         assert data["history"]["summary"] == "New summary narrative"
         assert "last_compressed_at" in data["history"]
 
@@ -501,7 +749,7 @@ class TestOpenRouterClient:
 
     def test_get_openrouter_config_defaults(self, monkeypatch):
         """Test default config values when not configured."""
-        monkeypatch.setattr("lib.compression.load_config", lambda: {})
+        monkeypatch.setattr(lib.compression, "load_config", _return_empty_dict)
 
         result = get_openrouter_config()
         assert result["api_key"] == ""
@@ -517,7 +765,7 @@ class TestOpenRouterClient:
                 "compression_interval": 600
             }
         }
-        monkeypatch.setattr("lib.compression.load_config", lambda: mock_config)
+        monkeypatch.setattr(lib.compression, "load_config", lambda: mock_config)
 
         result = get_openrouter_config()
         assert result["api_key"] == "test-key"
@@ -526,62 +774,66 @@ class TestOpenRouterClient:
 
     def test_call_openrouter_no_api_key(self, monkeypatch):
         """Test that missing API key returns error."""
-        monkeypatch.setattr("lib.compression.load_config", lambda: {})
+        monkeypatch.setattr(lib.compression, "load_config", _return_empty_dict)
 
         result, error = call_openrouter([{"role": "user", "content": "test"}])
         assert result is None
         assert error == "OpenRouter API key not configured"
 
-    @patch("lib.compression.requests.post")
+    @patch("lib.compression._openrouter_session.post")
     def test_call_openrouter_success(self, mock_post, monkeypatch):
         """Test successful API call."""
-        mock_config = {"openrouter": {"api_key": "test-key"}}
-        monkeypatch.setattr("lib.compression.load_config", lambda: mock_config)
+        monkeypatch.setattr(lib.compression, "load_config", _load_openrouter_config)
 
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {
-            "choices": [{"message": {"content": "Test response"}}]
-        }
-        mock_post.return_value = mock_response
+        mock_post.return_value = _StubResponse(200, b'{"choices": [{"message": {"content": "Test response"}}]}')
 
         result, error = call_openrouter([{"role": "user", "content": "test"}])
         assert result == "Test response"
         assert error is None
 
-    @patch("lib.compression.requests.post")
+        # The payload is sent pre-serialized
+        sent = mock_post.call_args.kwargs
+        assert sent["headers"]["Authorization"] == "Bearer test-key"
+        assert json.loads(sent["data"])["messages"] == [{"role": "user", "content": "test"}]
+
+    @patch("lib.compression._openrouter_session.post")
+    def test_call_openrouter_invalid_json(self, mock_post, monkeypatch):
+        """Test that a non-JSON 200 body is reported as a failed request."""
+        monkeypatch.setattr(lib.compression, "load_config", _load_openrouter_config)
+
+        mock_post.return_value = _StubResponse(200, b"<html>Bad gateway</html>")
+
+        result, error = call_openrouter([{"role": "user", "content": "test"}])
+        assert result is None
+        assert error == "Request failed: JSONDecodeError"
+
+    @patch("lib.compression._openrouter_session.post")
     def test_call_openrouter_rate_limited(self, mock_post, monkeypatch):
         """Test rate limiting (429) handling."""
-        mock_config = {"openrouter": {"api_key": "test-key"}}
-        monkeypatch.setattr("lib.compression.load_config", lambda: mock_config)
+        monkeypatch.setattr(lib.compression, "load_config", _load_openrouter_config)
 
-        mock_response = MagicMock()
-        mock_response.status_code = 429
-        mock_post.return_value = mock_response
+        mock_post.return_value = _StubResponse(429)
 
         result, error = call_openrouter([{"role": "user", "content": "test"}])
         assert result is None
         assert error == "rate_limited"
 
-    @patch("lib.compression.requests.post")
+    @patch("lib.compression._openrouter_session.post")
     def test_call_openrouter_auth_error(self, mock_post, monkeypatch):
         """Test authentication error (401) handling."""
         mock_config = {"openrouter": {"api_key": "bad-key"}}
-        monkeypatch.setattr("lib.compression.load_config", lambda: mock_config)
+        monkeypatch.setattr(lib.compression, "load_config", lambda: mock_config)
 
-        mock_response = MagicMock()
-        mock_response.status_code = 401
-        mock_post.return_value = mock_response
+        mock_post.return_value = _StubResponse(401)
 
         result, error = call_openrouter([{"role": "user", "content": "test"}])
         assert result is None
         assert error == "authentication_failed"
 
-    @patch("lib.compression.requests.post")
+    @patch("lib.compression._openrouter_session.post")
     def test_call_openrouter_timeout(self, mock_post, monkeypatch):
         """Test timeout handling."""
-        mock_config = {"openrouter": {"api_key": "test-key"}}
-        monkeypatch.setattr("lib.compression.load_config", lambda: mock_config)
+        monkeypatch.setattr(lib.compression, "load_config", _load_openrouter_config)
 
         mock_post.side_effect = requests.Timeout()
 
@@ -619,6 +871,19 @@ class TestCompressionPrompt:
         assert "Previous work on authentication" in messages[1]["content"]
         assert "Merge" in messages[1]["content"]
 
+    def test_build_batch_compression_prompt_uses_plural_instructions(self):
+        """Test that batch prompts ask to merge the sessions in order."""
+        sessions = [{"summary": "First"}, {"summary": "Second"}]
+
+        content = build_batch_compression_prompt(sessions, "Earlier work")[1]["content"]
+        assert content.endswith("Merge these sessions, in order, into the existing history, maintaining narrative flow.")
+        assert "the new session" not in content
+        assert "first sessions" in build_batch_compression_prompt(sessions)[1]["content"]
+
+        # A single session keeps the single-session prompt exactly
+        single = build_batch_compression_prompt(sessions[:1], "Earlier work")
+        assert single == build_compression_prompt(sessions[0], "Earlier work")
+
 
 class TestRetryLogic:
     """Tests for retry logic with exponential backoff."""
@@ -634,7 +899,7 @@ class TestRetryLogic:
             ]
         }
         test_file = temp_data_dir / "retry-test.yaml"
-        test_file.write_text(yaml.dump(test_data))
+        _write_yaml(test_file, test_data)
 
         mock_call.return_value = ("Compressed summary", None)
 
@@ -643,8 +908,7 @@ class TestRetryLogic:
         assert result["failed"] == 0
 
         # Verify session was removed from queue
-        data = yaml.safe_load(test_file.read_text())
-        assert len(data["pending_compressions"]) == 0
+        assert _load_queue_file(test_file) == []
 
     @patch("lib.compression.call_openrouter")
     def test_process_compression_queue_retry_on_timeout(self, mock_call, temp_data_dir):
@@ -657,7 +921,7 @@ class TestRetryLogic:
             ]
         }
         test_file = temp_data_dir / "timeout-test.yaml"
-        test_file.write_text(yaml.dump(test_data))
+        _write_yaml(test_file, test_data)
 
         mock_call.return_value = (None, "timeout")
 
@@ -666,9 +930,100 @@ class TestRetryLogic:
         assert result["remaining"] == 1
 
         # Verify session still in queue with incremented retry count
-        data = yaml.safe_load(test_file.read_text())
-        assert len(data["pending_compressions"]) == 1
-        assert data["pending_compressions"][0]["retry_count"] == 1
+        queue = _load_queue_file(test_file)
+        assert len(queue) == 1
+        assert queue[0]["retry_count"] == 1
+
+    @patch("lib.compression.call_openrouter")
+    def test_process_compression_queue_batches_sessions(self, mock_call, temp_data_dir):
+        """Test that queued sessions that fit in one batch share a single API call."""
+        test_data = {
+            "name": "batch-test",
+            "path": "/batch-test",
+            "pending_compressions": [
+                {"session_id": "s1", "summary": "First", "retry_count": 0},
+                {"session_id": "s2", "summary": "Second", "retry_count": 0},
+            ]
+        }
+        test_file = temp_data_dir / "batch-test.yaml"
+        _write_yaml(test_file, test_data)
+
+        mock_call.return_value = ("Compressed summary", None)
+
+        result = process_compression_queue("batch-test")
+        assert result["processed"] == 2
+        assert mock_call.call_count == 1
+
+        user_content = mock_call.call_args[0][0][1]["content"]
+        assert "Session 1:" in user_content and "Session 2:" in user_content
+        assert _load_queue_file(test_file) == []
+        assert _load_yaml(test_file)["history"]["summary"] == "Compressed summary"
+
+    @patch("lib.compression.call_openrouter")
+    def test_process_compression_queue_chunks_large_queues(self, mock_call, temp_data_dir, monkeypatch):
+        """Test that large queues are split into batches and a failing batch stops the run."""
+        test_data = {
+            "name": "chunk-test",
+            "path": "/chunk-test",
+            "pending_compressions": [
+                {"session_id": f"s{i}", "summary": f"Session {i}", "retry_count": 0}
+                for i in range(5)
+            ]
+        }
+        test_file = temp_data_dir / "chunk-test.yaml"
+        _write_yaml(test_file, test_data)
+
+        monkeypatch.setattr(lib.compression, "COMPRESSION_BATCH_SIZE", 2)
+        mock_call.side_effect = [("Compressed summary", None), (None, "timeout")]
+
+        result = process_compression_queue("chunk-test")
+        assert result["processed"] == 2
+        assert result["remaining"] == 3
+        assert mock_call.call_count == 2
+
+        # Only the failing batch is charged a retry; later sessions are untouched
+        queue = _load_queue_file(test_file)
+        assert [entry["session_id"] for entry in queue] == ["s2", "s3", "s4"]
+        assert [entry["retry_count"] for entry in queue] == [1, 1, 0]
+
+    @patch("lib.compression.call_openrouter")
+    def test_process_compression_queue_keeps_sessions_when_history_save_fails(
+        self, mock_call, temp_data_dir, monkeypatch
+    ):
+        """Test that sessions stay queued if the compressed history can't be written."""
+        test_file = temp_data_dir / "save-fail.yaml"
+        _write_yaml(test_file, {"name": "save-fail", "path": "/save-fail"})
+        test_file.with_suffix(".queue.json").write_text(
+            json.dumps({"s1": {"session_id": "s1", "summary": "Test", "retry_count": 0}})
+        )
+
+        monkeypatch.setattr(lib.projects, "write_atomic", _failing_write)
+        mock_call.return_value = ("Compressed summary", None)
+
+        result = process_compression_queue("save-fail")
+        assert result["processed"] == 0
+        assert result["remaining"] == 1
+
+        assert [entry["session_id"] for entry in _load_queue_file(test_file)] == ["s1"]
+        assert "history" not in _load_yaml(test_file)
+
+    @patch("lib.compression.call_openrouter")
+    def test_process_all_compression_queues(self, mock_call, temp_data_dir):
+        """Test that only projects with queued sessions are processed."""
+        for name, pending in (("busy-a", ["a1"]), ("busy-b", ["b1", "b2"]), ("idle", [])):
+            test_data = {
+                "name": name,
+                "path": f"/{name}",
+                "pending_compressions": [{"session_id": sid, "summary": sid} for sid in pending],
+            }
+            _write_yaml(temp_data_dir / f"{name}.yaml", test_data)
+
+        mock_call.return_value = ("Compressed summary", None)
+
+        results = process_all_compression_queues(["busy-a", "busy-b", "idle"])
+        assert sorted(results) == ["busy-a", "busy-b"]
+        assert results["busy-b"]["processed"] == 2
+        assert mock_call.call_count == 2
 
 
 class TestAddRecentSessionWithCompression:
@@ -686,7 +1041,7 @@ class TestAddRecentSessionWithCompression:
             ]
         }
         test_file = temp_data_dir / "fifo-test.yaml"
-        test_file.write_text(yaml.dump(test_data))
+        _write_yaml(test_file, test_data)
 
         # Add a 6th session
         new_session = {"session_id": "s-new", "summary": "New session"}
@@ -697,7 +1052,7 @@ class TestAddRecentSessionWithCompression:
         assert removed[0]["session_id"] == "s4"  # The oldest was removed
 
         # Verify state
-        data = yaml.safe_load(test_file.read_text())
+        data = _load_yaml(test_file)
         assert len(data["recent_sessions"]) == 5
         assert data["recent_sessions"][0]["session_id"] == "s-new"
 
@@ -711,7 +1066,7 @@ class TestAddRecentSessionWithCompression:
             ]
         }
         test_file = temp_data_dir / "under-limit.yaml"
-        test_file.write_text(yaml.dump(test_data))
+        _write_yaml(test_file, test_data)
 
         new_session = {"session_id": "s2", "summary": "Session 2"}
         success, removed = add_recent_session("under-limit", new_session)
@@ -719,9 +1074,33 @@ class TestAddRecentSessionWithCompression:
         assert success is True
         assert removed == []
 
-        data = yaml.safe_load(test_file.read_text())
+        data = _load_yaml(test_file)
         assert len(data["recent_sessions"]) == 2
 
+    def test_process_session_end_does_not_queue_when_save_fails(self, temp_data_dir, monkeypatch):
+        """Test that trimmed sessions aren't queued if the project YAML can't be written."""
+        test_data = {
+            "name": "end-fail",
+            "path": "/end-fail",
+            "recent_sessions": [
+                {"session_id": f"s{i}", "summary": f"Session {i}"}
+                for i in range(5)
+            ]
+        }
+        _write_yaml(temp_data_dir / "end-fail.yaml", test_data)
+
+        new_session = {"session_id": "s-new", "summary": "New session", "ended_at": "2026-01-01T00:00:00Z"}
+        monkeypatch.setattr(lib.summarization, "summarise_session", lambda path, uuid: dict(new_session))
+        monkeypatch.setattr(lib.projects, "write_atomic", _failing_write)
+        queued = []
+
+        result = process_session_end(
+            "end-fail", "/end-fail", "s-new",
+            compression_queue_callback=lambda name, session: queued.append(session),
+        )
+        assert result is None
+        assert queued == []
+
 
 # =============================================================================
 # Headspace Tests
@@ -733,7 +1112,7 @@ def temp_headspace_path(tmp_path, monkeypatch):
     """Create a temporary headspace file path for testing."""
     headspace_file = tmp_path / "data" / "headspace.yaml"
     headspace_file.parent.mkdir(parents=True, exist_ok=True)
-    monkeypatch.setattr("lib.headspace.HEADSPACE_DATA_PATH", headspace_file)
+    monkeypatch.setattr(lib.headspace, "HEADSPACE_DATA_PATH", headspace_file)
     return headspace_file
 
 
@@ -752,7 +1131,7 @@ class TestLoadHeadspace:
             "constraints": "No new features until CI green",
             "updated_at": "2026-01-21T10:00:00Z"
         }
-        temp_headspace_path.write_text(yaml.dump(test_data))
+        _write_yaml(temp_headspace_path, test_data)
 
         result = load_headspace()
         assert result is not None
@@ -766,7 +1145,7 @@ class TestLoadHeadspace:
             "current_focus": "Fix critical bug",
             "updated_at": "2026-01-21T10:00:00Z"
         }
-        temp_headspace_path.write_text(yaml.dump(test_data))
+        _write_yaml(temp_headspace_path, test_data)
 
         result = load_headspace()
         assert result is not None
@@ -775,7 +1154,7 @@ class TestLoadHeadspace:
 
     def test_load_empty_file(self, temp_headspace_path):
         """Test loading an empty file returns None."""
-        temp_headspace_path.write_text("")
+        temp_headspace_path.write_bytes(b"")
         result = load_headspace()
         assert result is None
 
@@ -793,7 +1172,7 @@ class TestSaveHeadspace:
 
         # Verify file was created
         assert temp_headspace_path.exists()
-        data = yaml.safe_load(temp_headspace_path.read_text())
+        data = _load_yaml(temp_headspace_path)
         assert data["current_focus"] == "Build new dashboard"
 
     def test_save_headspace_without_constraints(self, temp_headspace_path):
@@ -815,7 +1194,7 @@ class TestSaveHeadspace:
         assert result["constraints"] == "Second constraint"
 
         # Verify file has new data
-        data = yaml.safe_load(temp_headspace_path.read_text())
+        data = _load_yaml(temp_headspace_path)
         assert data["current_focus"] == "Second focus"
 
     def test_save_updates_timestamp(self, temp_headspace_path):
@@ -824,7 +1203,6 @@ class TestSaveHeadspace:
         timestamp1 = result1["updated_at"]
 
         # Small delay to ensure different timestamp
-        import time
         time.sleep(0.01)
 
         result2 = save_headspace("Second focus")
@@ -850,7 +1228,7 @@ class TestHeadspaceHistory:
                 {"current_focus": "Old task 2", "updated_at": "2026-01-19T10:00:00Z"}
             ]
         }
-        temp_headspace_path.write_text(yaml.dump(test_data))
+        _write_yaml(temp_headspace_path, test_data)
 
         result = get_headspace_history()
         assert len(result) == 2
@@ -866,44 +1244,49 @@ class TestHeadspaceHistory:
                 {"current_focus": "Old task", "updated_at": "2026-01-19T10:00:00Z"}
             ]
         }
-        temp_headspace_path.write_text(yaml.dump(initial_data))
+        _write_yaml(temp_headspace_path, initial_data)
 
         # Save new headspace (without history enabled)
         save_headspace("New task")
 
         # Verify history is preserved
-        data = yaml.safe_load(temp_headspace_path.read_text())
+        data = _load_yaml(temp_headspace_path)
         assert "history" in data
         assert len(data["history"]) == 1
 
+    def test_previous_focus_archived_when_enabled(self, temp_headspace_path, monkeypatch):
+        """Test that saving archives the previous focus when history is enabled."""
+        monkeypatch.setattr(lib.headspace, "load_config", _load_history_enabled_config)
 
-class TestHeadspaceConfiguration:
-    """Tests for headspace configuration helpers."""
-
-    def test_is_headspace_enabled_default(self, monkeypatch):
-        """Test headspace enabled by default."""
-        monkeypatch.setattr("lib.headspace.load_config", lambda: {})
-        assert is_headspace_enabled() is True
+        save_headspace("First focus")
+        save_headspace("Second focus")
 
-    def test_is_headspace_enabled_true(self, monkeypatch):
-        """Test headspace explicitly enabled."""
-        monkeypatch.setattr("lib.headspace.load_config", lambda: {"headspace": {"enabled": True}})
-        assert is_headspace_enabled() is True
+        data = _load_yaml(temp_headspace_path)
+        assert data["current_focus"] == "Second focus"
+        assert [entry["current_focus"] for entry in data["history"]] == ["First focus"]
 
-    def test_is_headspace_enabled_false(self, monkeypatch):
-        """Test headspace explicitly disabled."""
-        monkeypatch.setattr("lib.headspace.load_config", lambda: {"headspace": {"enabled": False}})
-        assert is_headspace_enabled() is False
 
-    def test_is_history_enabled_default(self, monkeypatch):
-        """Test history disabled by default."""
-        monkeypatch.setattr("lib.headspace.load_config", lambda: {})
-        assert is_headspace_history_enabled() is False
+class TestHeadspaceConfiguration:
+    """Tests for headspace configuration helpers."""
 
-    def test_is_history_enabled_true(self, monkeypatch):
-        """Test history explicitly enabled."""
-        monkeypatch.setattr("lib.headspace.load_config", lambda: {"headspace": {"history_enabled": True}})
-        assert is_headspace_history_enabled() is True
+    @pytest.mark.parametrize("config,expected", [
+        ({}, True),
+        ({"headspace": {"enabled": True}}, True),
+        ({"headspace": {"enabled": False}}, False),
+    ], ids=["default", "enabled", "disabled"])
+    def test_is_headspace_enabled(self, monkeypatch, config, expected):
+        """Test headspace is enabled unless explicitly disabled."""
+        monkeypatch.setattr(lib.headspace, "load_config", lambda: config)
+        assert is_headspace_enabled() is expected
+
+    @pytest.mark.parametrize("config,expected", [
+        ({}, False),
+        ({"headspace": {"history_enabled": True}}, True),
+    ], ids=["default", "enabled"])
+    def test_is_history_enabled(self, monkeypatch, config, expected):
+        """Test history tracking is disabled unless explicitly enabled."""
+        monkeypatch.setattr(lib.headspace, "load_config", lambda: config)
+        assert is_headspace_history_enabled() is expected
 
 
 # =============================================================================
@@ -913,24 +1296,19 @@ class TestHeadspaceConfiguration:
 class TestPrioritiesConfiguration:
     """Tests for priorities configuration helpers."""
 
-    def test_is_priorities_enabled_default(self, monkeypatch):
-        """Test priorities enabled by default."""
-        monkeypatch.setattr("lib.headspace.load_config", lambda: {})
-        assert is_priorities_enabled() is True
-
-    def test_is_priorities_enabled_true(self, monkeypatch):
-        """Test priorities explicitly enabled."""
-        monkeypatch.setattr("lib.headspace.load_config", lambda: {"priorities": {"enabled": True}})
-        assert is_priorities_enabled() is True
-
-    def test_is_priorities_enabled_false(self, monkeypatch):
-        """Test priorities explicitly disabled."""
-        monkeypatch.setattr("lib.headspace.load_config", lambda: {"priorities": {"enabled": False}})
-        assert is_priorities_enabled() is False
+    @pytest.mark.parametrize("config,expected", [
+        ({}, True),
+        ({"priorities": {"enabled": True}}, True),
+        ({"priorities": {"enabled": False}}, False),
+    ], ids=["default", "enabled", "disabled"])
+    def test_is_priorities_enabled(self, monkeypatch, config, expected):
+        """Test priorities are enabled unless explicitly disabled."""
+        monkeypatch.setattr(lib.headspace, "load_config", lambda: config)
+        assert is_priorities_enabled() is expected
 
     def test_get_priorities_config_defaults(self, monkeypatch):
         """Test default priorities config values."""
-        monkeypatch.setattr("lib.headspace.load_config", lambda: {})
+        monkeypatch.setattr(lib.headspace, "load_config", _return_empty_dict)
         config = get_priorities_config()
         assert config["enabled"] is True
         assert config["polling_interval"] == 60
@@ -938,7 +1316,7 @@ class TestPrioritiesConfiguration:
 
     def test_get_priorities_config_custom(self, monkeypatch):
         """Test custom priorities config values."""
-        monkeypatch.setattr("lib.headspace.load_config", lambda: {
+        monkeypatch.setattr(lib.headspace, "load_config", lambda: {
             "priorities": {
                 "enabled": False,
                 "polling_interval": 120,
@@ -951,17 +1329,33 @@ class TestPrioritiesConfiguration:
         assert config["model"] == "custom-model"
 
 
+# Project lists returned by the patched list_project_data(); the aggregators
+# only read them, so the same tuples are shared by every test
+_MOCK_PROJECTS_ROADMAP = (
+    {"name": "project-a", "roadmap": {"next_up": {"title": "Feature X"}, "upcoming": ["Y", "Z"]}},
+    {"name": "project-b", "roadmap": {"next_up": {"title": "Feature Y"}}},
+    {"name": "project-c"},  # No roadmap
+)
+_MOCK_PROJECTS_STATE = (
+    {"name": "project-a", "state": {"summary": "Working on tests"}, "recent_sessions": [1, 2, 3, 4, 5]},
+    {"name": "project-b", "state": {"summary": "Bug fixes"}},
+)
+
+
+def _list_roadmap_projects(readonly=False):
+    return _MOCK_PROJECTS_ROADMAP
+
+
+def _list_state_projects(readonly=False):
+    return _MOCK_PROJECTS_STATE
+
+
 class TestContextAggregation:
     """Tests for priority context aggregation functions."""
 
     def test_get_all_project_roadmaps(self, monkeypatch):
         """Test gathering roadmap data from projects."""
-        mock_projects = [
-            {"name": "project-a", "roadmap": {"next_up": {"title": "Feature X"}, "upcoming": ["Y", "Z"]}},
-            {"name": "project-b", "roadmap": {"next_up": {"title": "Feature Y"}}},
-            {"name": "project-c"}  # No roadmap
-        ]
-        monkeypatch.setattr("lib.projects.list_project_data", lambda: mock_projects)
+        monkeypatch.setattr(lib.projects, "list_project_data", _list_roadmap_projects)
 
         roadmaps = get_all_project_roadmaps()
         assert "project-a" in roadmaps
@@ -971,11 +1365,7 @@ class TestContextAggregation:
 
     def test_get_all_project_states(self, monkeypatch):
         """Test gathering state data from projects."""
-        mock_projects = [
-            {"name": "project-a", "state": {"summary": "Working on tests"}, "recent_sessions": [1, 2, 3, 4, 5]},
-            {"name": "project-b", "state": {"summary": "Bug fixes"}},
-        ]
-        monkeypatch.setattr("lib.projects.list_project_data", lambda: mock_projects)
+        monkeypatch.setattr(lib.projects, "list_project_data", _list_state_projects)
 
         states = get_all_project_states()
         assert states["project-a"]["summary"] == "Working on tests"
@@ -983,17 +1373,14 @@ class TestContextAggregation:
 
     def test_aggregate_priority_context(self, monkeypatch):
         """Test aggregating all priority context."""
-        monkeypatch.setattr("lib.headspace.load_headspace", lambda: {"current_focus": "Testing"})
-        monkeypatch.setattr("lib.headspace.get_all_project_roadmaps", lambda: {})
-        monkeypatch.setattr("lib.headspace.get_all_project_states", lambda: {})
-        monkeypatch.setattr("lib.headspace.load_config", lambda: {"projects": []})
-        monkeypatch.setattr("lib.sessions.scan_sessions", lambda c: [])
+        monkeypatch.setattr(lib.headspace, "load_headspace", lambda: {"current_focus": "Testing"})
+        monkeypatch.setattr(lib.headspace, "get_all_project_roadmaps", _return_empty_dict)
+        monkeypatch.setattr(lib.headspace, "get_all_project_states", _return_empty_dict)
+        monkeypatch.setattr(lib.headspace, "load_config", lambda: {"projects": []})
+        monkeypatch.setattr(lib.sessions, "scan_sessions", _scan_no_sessions)
 
         context = aggregate_priority_context()
-        assert "headspace" in context
-        assert "roadmaps" in context
-        assert "states" in context
-        assert "sessions" in context
+        assert context.keys() >= {"headspace", "roadmaps", "states", "sessions"}
         assert context["headspace"]["current_focus"] == "Testing"
 
 
@@ -1044,6 +1431,12 @@ class TestBuildPrioritisationPrompt:
         assert "input_needed" in messages[1]["content"]
 
 
+# Raw AI responses for parse_priority_response(), defined once
+_PRIORITY_RESPONSE_VALID = '{"priorities": [{"project_name": "api", "session_id": "123", "priority_score": 90, "rationale": "High priority"}]}'
+_PRIORITY_RESPONSE_CODE_BLOCK = '```json\n{"priorities": [{"project_name": "test", "session_id": "1", "priority_score": 75, "rationale": "Test"}]}\n```'
+_PRIORITY_RESPONSE_OVER_SCORE = '{"priorities": [{"project_name": "test", "session_id": "1", "priority_score": 150, "rationale": "Over"}]}'
+
+
 class TestParsePriorityResponse:
     """Tests for parsing AI responses."""
 
@@ -1053,9 +1446,7 @@ class TestParsePriorityResponse:
             {"project_name": "api", "session_id": "123", "activity_state": "idle"},
             {"project_name": "web", "session_id": "456", "activity_state": "processing"}
         ]
-        response = '{"priorities": [{"project_name": "api", "session_id": "123", "priority_score": 90, "rationale": "High priority"}]}'
-
-        result = parse_priority_response(response, sessions)
+        result = parse_priority_response(_PRIORITY_RESPONSE_VALID, sessions)
         assert len(result) == 2  # All sessions included
         assert result[0]["priority_score"] == 90
         assert result[0]["rationale"] == "High priority"
@@ -1063,9 +1454,7 @@ class TestParsePriorityResponse:
     def test_parse_json_in_code_block(self):
         """Test parsing JSON wrapped in markdown code block."""
         sessions = [{"project_name": "test", "session_id": "1", "activity_state": "idle"}]
-        response = '```json\n{"priorities": [{"project_name": "test", "session_id": "1", "priority_score": 75, "rationale": "Test"}]}\n```'
-
-        result = parse_priority_response(response, sessions)
+        result = parse_priority_response(_PRIORITY_RESPONSE_CODE_BLOCK, sessions)
         assert result[0]["priority_score"] == 75
 
     def test_parse_malformed_response(self):
@@ -1092,9 +1481,7 @@ class TestParsePriorityResponse:
     def test_parse_clamps_priority_score(self):
         """Test priority score is clamped to 0-100."""
         sessions = [{"project_name": "test", "session_id": "1", "activity_state": "idle"}]
-        response = '{"priorities": [{"project_name": "test", "session_id": "1", "priority_score": 150, "rationale": "Over"}]}'
-
-        result = parse_priority_response(response, sessions)
+        result = parse_priority_response(_PRIORITY_RESPONSE_OVER_SCORE, sessions)
         assert result[0]["priority_score"] == 100  # Clamped
 
 
@@ -1126,32 +1513,33 @@ class TestDefaultPriorityOrder:
         assert result[1]["project_name"] == "zebra"
 
 
+# Priorities cache contents with nothing computed yet, for patch.dict(..., clear=True)
+_EMPTY_PRIORITIES_CACHE = {
+    "priorities": None,
+    "timestamp": None,
+    "pending_priorities": None,
+    "error": None
+}
+
+
 class TestCacheValidity:
     """Tests for cache validity logic."""
 
-    def test_cache_invalid_when_empty(self, monkeypatch):
+    def test_cache_invalid_when_empty(self):
         """Test cache is invalid when no priorities cached."""
-        import lib.headspace
-        monkeypatch.setattr("lib.headspace._priorities_cache", {
-            "priorities": None,
-            "timestamp": None,
-            "pending_priorities": None,
-            "error": None
-        })
-        assert is_cache_valid() is False
+        with patch.dict(_priorities_cache, _EMPTY_PRIORITIES_CACHE, clear=True):
+            assert is_cache_valid() is False
 
-    def test_cache_valid_within_interval(self, monkeypatch):
+    def test_cache_valid_within_interval(self, monkeypatch, frozen_now):
         """Test cache is valid within polling interval."""
-        import lib.headspace
-        now = datetime.now(timezone.utc)
-        monkeypatch.setattr("lib.headspace._priorities_cache", {
+        monkeypatch.setattr(lib.headspace, "get_priorities_config", lambda: {"polling_interval": 60})
+        with patch.dict(_priorities_cache, {
             "priorities": [{"test": "data"}],
-            "timestamp": now,
+            "timestamp": frozen_now,
             "pending_priorities": None,
             "error": None
-        })
-        monkeypatch.setattr("lib.headspace.get_priorities_config", lambda: {"polling_interval": 60})
-        assert is_cache_valid() is True
+        }, clear=True):
+            assert is_cache_valid() is True
 
 
 class TestSoftTransitions:
@@ -1173,37 +1561,28 @@ class TestSoftTransitions:
         ]
         assert is_any_session_processing(sessions) is False
 
-    def test_apply_soft_transition_with_processing(self, monkeypatch):
+    def test_apply_soft_transition_with_processing(self, frozen_now):
         """Test soft transition stores pending when processing."""
-        import lib.headspace
-        monkeypatch.setattr("lib.headspace._priorities_cache", {
-            "priorities": [{"old": "data"}],
-            "timestamp": datetime.now(timezone.utc),
-            "pending_priorities": None,
-            "error": None
-        })
-
         new_priorities = [{"new": "data"}]
         sessions = [{"activity_state": "processing"}]
 
-        result, pending = apply_soft_transition(new_priorities, sessions)
+        with patch.dict(_priorities_cache, {
+            "priorities": [{"old": "data"}],
+            "timestamp": frozen_now,
+            "pending_priorities": None,
+            "error": None
+        }, clear=True):
+            result, pending = apply_soft_transition(new_priorities, sessions)
         assert pending is True
         assert result[0]["old"] == "data"  # Returns old
 
-    def test_apply_soft_transition_no_processing(self, monkeypatch):
+    def test_apply_soft_transition_no_processing(self):
         """Test soft transition applies immediately when not processing."""
-        import lib.headspace
-        monkeypatch.setattr("lib.headspace._priorities_cache", {
-            "priorities": None,
-            "timestamp": None,
-            "pending_priorities": None,
-            "error": None
-        })
-
         new_priorities = [{"new": "data"}]
         sessions = [{"activity_state": "idle"}]
 
-        result, pending = apply_soft_transition(new_priorities, sessions)
+        with patch.dict(_priorities_cache, _EMPTY_PRIORITIES_CACHE, clear=True):
+            result, pending = apply_soft_transition(new_priorities, sessions)
         assert pending is False
         assert result[0]["new"] == "data"
 
@@ -1214,70 +1593,65 @@ class TestComputePriorities:
     def test_compute_when_disabled(self, monkeypatch):
         """Test compute returns error when disabled."""
         # Must patch at the monitor module level since that's where compute_priorities imports from
-        monkeypatch.setattr("monitor.is_priorities_enabled", lambda: False)
+        monkeypatch.setattr(monitor, "is_priorities_enabled", _return_false)
 
-        result = compute_priorities()
+        result = monitor.compute_priorities()
         assert result["success"] is False
         assert "disabled" in result["error"]
 
     def test_compute_with_no_sessions(self, monkeypatch):
         """Test compute handles no active sessions."""
         # Must patch at the monitor module level since that's where compute_priorities imports from
-        monkeypatch.setattr("monitor.is_priorities_enabled", lambda: True)
-        monkeypatch.setattr("monitor.get_cached_priorities", lambda: None)
-        monkeypatch.setattr("monitor.aggregate_priority_context", lambda: {
+        monkeypatch.setattr(monitor, "is_priorities_enabled", _return_true)
+        monkeypatch.setattr(monitor, "get_cached_priorities", _return_none)
+        monkeypatch.setattr(monitor, "aggregate_priority_context", lambda: {
             "headspace": None,
             "roadmaps": {},
             "states": {},
             "sessions": []
         })
 
-        result = compute_priorities(force_refresh=True)
+        result = monitor.compute_priorities(force_refresh=True)
         assert result["success"] is True
         assert result["priorities"] == []
 
     def test_compute_with_openrouter_error(self, monkeypatch):
         """Test graceful degradation when OpenRouter fails."""
-        import lib.headspace
         # Must patch at the monitor module level since that's where compute_priorities imports from
-        monkeypatch.setattr("monitor.is_priorities_enabled", lambda: True)
-        monkeypatch.setattr("monitor.get_cached_priorities", lambda: None)
-        monkeypatch.setattr("lib.headspace._priorities_cache", {
-            "priorities": None,
-            "timestamp": None,
-            "pending_priorities": None,
-            "error": None
-        })
-        monkeypatch.setattr("monitor.aggregate_priority_context", lambda: {
+        monkeypatch.setattr(monitor, "is_priorities_enabled", _return_true)
+        monkeypatch.setattr(monitor, "get_cached_priorities", _return_none)
+        monkeypatch.setattr(monitor, "aggregate_priority_context", lambda: {
             "headspace": {"current_focus": "Testing"},
             "roadmaps": {},
             "states": {},
             "sessions": [{"project_name": "test", "session_id": "1", "activity_state": "idle", "task_summary": ""}]
         })
-        monkeypatch.setattr("monitor.get_priorities_config", lambda: {"model": "test"})
-        monkeypatch.setattr("monitor.call_openrouter", lambda m, model: (None, "API error"))
+        monkeypatch.setattr(monitor, "get_priorities_config", lambda: {"model": "test"})
+        monkeypatch.setattr(monitor, "call_openrouter", lambda m, model: (None, "API error"))
 
-        result = compute_priorities(force_refresh=True)
+        with patch.dict(_priorities_cache, _EMPTY_PRIORITIES_CACHE, clear=True):
+            result = monitor.compute_priorities(force_refresh=True)
         assert result["success"] is True  # Still succeeds with fallback
         assert len(result["priorities"]) == 1
         assert "error" in result["metadata"]
 
 
+@pytest.mark.xdist_group("flask_client")
 class TestApiPrioritiesEndpoint:
     """Tests for the /api/priorities endpoint."""
 
-    @pytest.fixture
-    def client(self):
-        """Create Flask test client."""
-        from monitor import app
-        app.config["TESTING"] = True
-        with app.test_client() as client:
+    @pytest.fixture(scope="class")
+    @classmethod
+    def client(cls):
+        """Create one Flask test client shared by the tests in this class."""
+        monitor.app.config["TESTING"] = True
+        with monitor.app.test_client() as client:
             yield client
 
     def test_priorities_endpoint_disabled(self, client, monkeypatch):
         """Test endpoint returns 404 when disabled."""
         # Must patch at the monitor module level since that's where api_priorities imports from
-        monkeypatch.setattr("monitor.is_priorities_enabled", lambda: False)
+        monkeypatch.setattr(monitor, "is_priorities_enabled", _return_false)
 
         response = client.get("/api/priorities")
         assert response.status_code == 404
@@ -1286,9 +1660,8 @@ class TestApiPrioritiesEndpoint:
 
     def test_priorities_endpoint_success(self, client, monkeypatch):
         """Test endpoint returns priorities."""
-        import monitor
-        monkeypatch.setattr("lib.headspace.is_priorities_enabled", lambda: True)
-        monkeypatch.setattr("monitor.compute_priorities", lambda force_refresh=False: {
+        monkeypatch.setattr(lib.headspace, "is_priorities_enabled", _return_true)
+        monkeypatch.setattr(monitor, "compute_priorities", lambda force_refresh=False: {
             "success": True,
             "priorities": [
                 {"project_name": "test", "session_id": "1", "priority_score": 80, "rationale": "High", "activity_state": "idle"}
@@ -1315,8 +1688,154 @@ class TestApiPrioritiesEndpoint:
             calls.append(force_refresh)
             return {"success": True, "priorities": [], "metadata": {}}
 
-        monkeypatch.setattr("lib.headspace.is_priorities_enabled", lambda: True)
-        monkeypatch.setattr("monitor.compute_priorities", mock_compute)
+        monkeypatch.setattr(lib.headspace, "is_priorities_enabled", _return_true)
+        monkeypatch.setattr(monitor, "compute_priorities", mock_compute)
 
         client.get("/api/priorities?refresh=true")
         assert calls[-1] is True
+
+
+# =============================================================================
+# Timestamp Tests
+# =============================================================================
+
+
+class TestUtcNowIso:
+    """Tests for utc_now_iso() function."""
+
+    def test_matches_datetime_now(self):
+        """Test that the timestamp parses as the current UTC time."""
+        before = datetime.now(_UTC)
+        stamp = utc_now_iso()
+        after = datetime.now(_UTC)
+
+        assert stamp.endswith("+00:00")
+        assert before <= datetime.fromisoformat(stamp) <= after
+
+    def test_z_suffix(self):
+        """Test that the Z suffix variant parses to the same zone."""
+        stamp = utc_now_iso(z_suffix=True)
+
+        assert stamp.endswith("Z")
+        assert datetime.fromisoformat(stamp.replace("Z", "+00:00")).tzinfo == _UTC
+
+
+class TestParseIso:
+    """Tests for parse_iso() function."""
+
+    def test_z_suffix_is_utc(self):
+        """Test that a trailing Z parses as UTC."""
+        assert parse_iso("2024-01-01T00:00:00Z") == _FROZEN_NOW
+
+    def test_repeated_stamp_returns_same_object(self):
+        """Test that repeat parses are served from the memo."""
+        assert parse_iso("2024-01-01T12:30:00+00:00") is parse_iso("2024-01-01T12:30:00+00:00")
+
+
+# =============================================================================
+# Storage Tests
+# =============================================================================
+
+
+class TestJsonStorage:
+    """Tests for the JSON sidecar helpers in lib.storage."""
+
+    def test_dump_json_same_with_or_without_orjson(self, monkeypatch):
+        """Test that the optional orjson path writes the stdlib document."""
+        data = {"id": "abc", "summary": "naïve", "when": datetime(2024, 1, 2, 3, 4, 5), 1: None}
+        dumped = lib.storage.dump_json(data)
+
+        monkeypatch.setattr(lib.storage, "orjson", None)
+        assert lib.storage.dump_json(data) == dumped
+        assert json.loads(dumped) == {"id": "abc", "summary": "naïve", "when": "2024-01-02 03:04:05", "1": None}
+
+
+class TestWriteAtomic:
+    """Tests for write_atomic() in lib.storage."""
+
+    def test_keeps_permissions_of_existing_file(self, tmp_path):
+        """Test that rewriting a private file doesn't widen its mode."""
+        target = tmp_path / "config.yaml"
+        target.write_bytes(b"api_key: old\n")
+        target.chmod(0o600)
+
+        lib.storage.write_atomic(target, b"api_key: new\n")
+        assert target.read_bytes() == b"api_key: new\n"
+        assert target.stat().st_mode & 0o777 == 0o600
+
+    def test_writes_through_symlink(self, tmp_path):
+        """Test that a symlinked path is kept and its target is updated."""
+        target = tmp_path / "real.yaml"
+        target.write_bytes(b"old\n")
+        link = tmp_path / "link.yaml"
+        link.symlink_to(target)
+
+        lib.storage.write_atomic(link, b"new\n")
+        assert link.is_symlink()
+        assert target.read_bytes() == b"new\n"
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["link.yaml", "real.yaml"]
+
+
+# =============================================================================
+# Session Activity Tests
+# =============================================================================
+
+
+class TestParseActivityState:
+    """Tests for parse_activity_state() function."""
+
+    @pytest.mark.parametrize("content", [
+        "Do you want to proceed?\n❯ 1. Yes\n  2. No",
+        "Allow once",
+        "ALLOW FOR THIS SESSION",
+        "Overwrite file? [y/N]",
+        "Enter to select · ↑/↓ to navigate",
+        "Should I proceed with the refactor",
+        "CHECKPOINT: review the plan",
+    ])
+    def test_input_needed_patterns(self, content):
+        """Test that prompts in the terminal tail mark the session input_needed."""
+        state, _ = parse_activity_state("✳ Fix tests", "build output\n" + content)
+        assert state == "input_needed"
+
+    def test_only_end_of_content_is_scanned(self):
+        """Test that a prompt scrolled above the scan window is ignored."""
+        content = "Allow once\n" + "x" * lib.sessions.CONTENT_SCAN_CHARS
+
+        assert parse_activity_state("✳ Fix tests", content)[0] == "idle"
+        assert parse_activity_state("✳ Fix tests", content + "\nAllow once")[0] == "input_needed"
+
+    @pytest.mark.parametrize("title,content,expected", [
+        ("✳ Fix tests", "All 42 tests passed.", "idle"),
+        ("⠋ Fix tests", "Allow once", "processing"),
+        ("Fix tests", "Type something", "input_needed"),
+        ("Fix tests", "", "unknown"),
+        ("", "Allow once", "unknown"),
+    ])
+    def test_state_from_title_and_content(self, title, content, expected):
+        """Test the title prefix and content scan combine into the right state."""
+        state, _ = parse_activity_state(title, content)
+        assert state == expected
+
+    def test_uuid_and_prefix_removed_from_summary(self):
+        """Test the task summary drops the status prefix and session UUID."""
+        title = "⠋ Fix tests - 3F2504E0-4F89-11D3-9A0C-0305E82C3301"
+        assert parse_activity_state(title, "")[1] == "Fix tests"
+
+
+class TestFormatElapsed:
+    """Tests for format_elapsed() function."""
+
+    @pytest.mark.parametrize("seconds,expected", [
+        (-1, "just now"),
+        (0, "0s"),
+        (59.9, "59s"),
+        (60, "1m"),
+        (3599.5, "59m"),
+        (3600, "1h 0m"),
+        (9000, "2h 30m"),
+    ])
+    def test_format_elapsed(self, seconds, expected):
+        """Test seconds are formatted as s, m, or h m."""
+        assert format_elapsed(seconds) == expected
+